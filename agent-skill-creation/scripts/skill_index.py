@@ -0,0 +1,386 @@
+"""Cached trigger index and token-cost profile for a skills folder.
+
+Walks the skills tree, reads each SKILL.md frontmatter (``name``,
+``description``) and keeps the result in ``.skill-index.json``. Files whose
+mtime and size are unchanged are not read again; files that were touched
+but hash the same are not re-parsed. Agent startup only needs the index.
+
+    python3 skill_index.py index                 # compact name/description/triggers list
+    python3 skill_index.py match "scrape tweets from a profile"
+    python3 skill_index.py report                # tokens per SKILL.md and linked reference, duplicated blocks
+    python3 skill_index.py report --budget 3000  # exit 1 if any SKILL.md is over budget
+
+Token counts use tiktoken (cl100k_base) when it is installed, otherwise
+about 4 characters per token.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from typing import Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # not installed, or no cached encoding offline
+    _ENCODING = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.dirname(os.path.dirname(HERE))
+CACHE_NAME = ".skill-index.json"
+CACHE_VERSION = 2
+SKILL_FILES = ("SKILL.md", "skill.md")
+MIN_LINE = 16  # shorter lines (fences, headings, "| --- |") never count as duplicated content
+MIN_CODE_LINE = 6  # inside code fences, where "reload" or "get url" is a whole command
+MIN_SHARED = 8  # lines two files must share, in any order, to be reported as overlapping
+
+LINK = re.compile(r"\]\(([^)\s#]+)[^)]*\)|`((?:references|scripts|templates|examples)/[\w./-]+|[\w-]+\.md)`")
+# In code blocks the same command is written with and without the CLI prefix
+# and with different trailing comments; compare just the command.
+COMMAND_PREFIX = re.compile(r"^agent-browser(?: --cdp \d+)? ")
+TRAILING_COMMENT = re.compile(r"\s+#(?:\s.*)?$")
+QUOTED = re.compile(r"""['"“]([^'"”]{3,80})['"”]""")
+
+
+def estimate_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def parse_frontmatter(text: str) -> dict:
+    """The flat ``key: value`` YAML header used by SKILL.md files."""
+    if not text.startswith("---"):
+        return {}
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}
+    meta = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not line.startswith((" ", "\t")):
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+                value = value[1:-1]
+            meta[key.strip()] = value
+    return meta
+
+
+def triggers(description: str) -> list[str]:
+    """Quoted trigger phrases, or else the 'Use when asked to ...' clause split on commas."""
+    found = [q.strip() for q in QUOTED.findall(description)]
+    match = re.search(r"(?:use|triggers?)(?: this skill)? when (?:asked to |the user asks to )?([^.]+)",
+                      description, re.IGNORECASE)
+    if match and not found:
+        found = [p.strip() for p in re.split(r",\s*(?:or\s+)?|\s+or\s+", match.group(1)) if p.strip()]
+    return found
+
+
+def _norm(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def _content_lines(text: str) -> list[tuple[int, str]]:
+    """(line number, normalized text) for lines that count as content."""
+    out, in_code = [], False
+    for number, line in enumerate(text.splitlines(), 1):
+        norm = _norm(line)
+        if norm.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code:
+            norm = TRAILING_COMMENT.sub("", COMMAND_PREFIX.sub("", norm))
+            if len(norm) >= MIN_CODE_LINE and not norm.startswith("#"):
+                out.append((number, norm))
+        elif len(norm) >= MIN_LINE and not re.fullmatch(r"[|:\-\s`#]*\w*", norm):
+            out.append((number, norm))
+    return out
+
+
+def scan_file(path: str, text: str) -> dict:
+    """Everything the index and report need from one file."""
+    lines = [[number, hashlib.sha1(norm.encode()).hexdigest()[:12]] for number, norm in _content_lines(text)]
+    entry = {"tokens": estimate_tokens(text), "chars": len(text), "lines": lines}
+    if path.endswith(".md"):
+        base = os.path.dirname(path)
+        links = []
+        for match in LINK.finditer(text):
+            target = match.group(1) or match.group(2)
+            if "://" in target:
+                continue
+            resolved = os.path.normpath(os.path.join(base, target))
+            if os.path.isfile(resolved) and resolved != path and resolved not in links:
+                links.append(resolved)
+        entry["links"] = links
+    if os.path.basename(path) in SKILL_FILES:
+        meta = parse_frontmatter(text)
+        entry["meta"] = {"name": meta.get("name", ""), "description": meta.get("description", "")}
+    return entry
+
+
+class Index:
+    """The on-disk cache plus incremental refresh."""
+
+    def __init__(self, root: str, cache: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.cache_path = cache or os.path.join(self.root, CACHE_NAME)
+        self.files: dict[str, dict] = {}
+        self.stats = {"unchanged": 0, "touched": 0, "parsed": 0, "removed": 0}
+        try:
+            with open(self.cache_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("version") == CACHE_VERSION and data.get("tokenizer") == self.tokenizer:
+                self.files = data["files"]
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def tokenizer(self) -> str:
+        return "cl100k_base" if _ENCODING is not None else "chars/4"
+
+    def skill_dirs(self) -> list[tuple[str, str]]:
+        found = []
+        for entry in sorted(os.listdir(self.root)):
+            folder = os.path.join(self.root, entry)
+            if entry.startswith(".") or not os.path.isdir(folder):
+                continue
+            for name in SKILL_FILES:
+                if os.path.isfile(os.path.join(folder, name)):
+                    found.append((entry, os.path.join(folder, name)))
+                    break
+        return found
+
+    def _refresh_file(self, path: str) -> dict:
+        rel = os.path.relpath(path, self.root)
+        st = os.stat(path)
+        cached = self.files.get(rel)
+        if cached and cached["mtime"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            self.stats["unchanged"] += 1
+            return cached
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached and cached["sha256"] == digest:
+            self.stats["touched"] += 1
+        else:
+            self.stats["parsed"] += 1
+            cached = scan_file(path, raw.decode("utf-8", errors="replace"))
+            cached["links"] = [os.path.relpath(p, self.root) for p in cached.get("links", [])]
+            cached["sha256"] = digest
+        cached.update(mtime=st.st_mtime_ns, size=st.st_size)
+        self.files[rel] = cached
+        return cached
+
+    def refresh(self) -> "Index":
+        """Re-read only what changed; follow SKILL.md links one level into each skill."""
+        live = set()
+        for skill, path in self.skill_dirs():
+            entry = self._refresh_file(path)
+            rel = os.path.relpath(path, self.root)
+            entry["skill"] = skill
+            live.add(rel)
+            for link in list(entry.get("links", [])):
+                target = os.path.join(self.root, link)
+                if os.path.isfile(target) and link not in live:
+                    self._refresh_file(target)["skill"] = link.split(os.sep)[0]
+                    live.add(link)
+        for rel in set(self.files) - live:
+            del self.files[rel]
+            self.stats["removed"] += 1
+        if self.stats["parsed"] or self.stats["touched"] or self.stats["removed"] or not os.path.exists(self.cache_path):
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"version": CACHE_VERSION, "tokenizer": self.tokenizer, "files": self.files}, fh)
+            os.replace(tmp, self.cache_path)
+        return self
+
+    def skills(self) -> list[dict]:
+        out = []
+        for rel, entry in sorted(self.files.items()):
+            if "meta" not in entry:
+                continue
+            linked = [{"path": link, "tokens": self.files[link]["tokens"]}
+                      for link in entry.get("links", []) if link in self.files]
+            # Only linked markdown is read into context; scripts are run, so they cost nothing.
+            docs = [l for l in linked if l["path"].endswith(".md")]
+            out.append({
+                "skill": entry["skill"], "path": rel, **entry["meta"],
+                "triggers": triggers(entry["meta"]["description"]),
+                "tokens": entry["tokens"], "linked": docs,
+                "scripts": [l for l in linked if not l["path"].endswith(".md")],
+                "total_tokens": entry["tokens"] + sum(l["tokens"] for l in docs),
+            })
+        return out
+
+    def duplicates(self, min_lines: int = 3) -> list[dict]:
+        """Runs of at least ``min_lines`` consecutive identical lines shared by two files."""
+        where: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        for rel, entry in self.files.items():
+            for pos, (_, digest) in enumerate(entry["lines"]):
+                where[digest].append((rel, pos))
+        runs = []
+        for a, entry in sorted(self.files.items()):
+            lines_a = entry["lines"]
+            for pos, (_, digest) in enumerate(lines_a):
+                for b, pos_b in where[digest]:
+                    if b <= a:
+                        continue
+                    lines_b = self.files[b]["lines"]
+                    # Only start at the beginning of a run.
+                    if pos and pos_b and lines_a[pos - 1][1] == lines_b[pos_b - 1][1]:
+                        continue
+                    n = 0
+                    while (pos + n < len(lines_a) and pos_b + n < len(lines_b)
+                           and lines_a[pos + n][1] == lines_b[pos_b + n][1]):
+                        n += 1
+                    if n >= min_lines:
+                        runs.append({"lines": n, "a": f"{a}:{lines_a[pos][0]}", "b": f"{b}:{lines_b[pos_b][0]}",
+                                     "end": lines_a[pos + n - 1][0],
+                                     "cross_skill": self.files[a]["skill"] != self.files[b]["skill"]})
+        for run in runs:
+            path, _, line = run["a"].rpartition(":")
+            text = self._read(path)
+            # Re-read only the flagged span to price it and show where it starts.
+            run["tokens"] = estimate_tokens("\n".join(text[int(line) - 1:run.pop("end")]))
+            run["preview"] = _norm(text[int(line) - 1])[:70]
+        runs.sort(key=lambda r: (-r["cross_skill"], -r["tokens"]))
+        return runs
+
+    def overlaps(self, min_shared: int = MIN_SHARED) -> list[dict]:
+        """File pairs sharing at least ``min_shared`` content lines in any order.
+
+        Catches a quick-reference list re-stated in a reference file with the
+        lines reordered or interleaved, which has no long identical run.
+        """
+        where: dict[str, set[str]] = defaultdict(set)
+        for rel, entry in self.files.items():
+            if not rel.endswith(".md"):  # scripts are run, not read
+                continue
+            for _, digest in entry["lines"]:
+                where[digest].add(rel)
+        shared: dict[tuple[str, str], set[str]] = defaultdict(set)
+        for digest, files in where.items():
+            for a in files:
+                for b in files:
+                    if a < b:
+                        shared[(a, b)].add(digest)
+        out = []
+        for (a, b), digests in shared.items():
+            if len(digests) < min_shared:
+                continue
+            text = self._read(a)
+            numbers = [n for n, d in self.files[a]["lines"] if d in digests]
+            out.append({"a": a, "b": b, "lines": len(digests),
+                        "tokens": estimate_tokens("\n".join(text[n - 1] for n in numbers)),
+                        "cross_skill": self.files[a]["skill"] != self.files[b]["skill"]})
+        out.sort(key=lambda o: (-o["cross_skill"], -o["tokens"]))
+        return out
+
+    def _read(self, rel: str) -> list[str]:
+        with open(os.path.join(self.root, rel), encoding="utf-8", errors="replace") as fh:
+            return fh.read().splitlines()
+
+
+def _print_report(index: Index, skills: list[dict], dups: list[dict], overlaps: list[dict],
+                  budget: Optional[int]) -> int:
+    over = 0
+    print(f"{'skill':<22} {'file':<42} {'tokens':>7}")
+    for s in skills:
+        flag = ""
+        if budget and s["tokens"] > budget:
+            flag, over = f"  over budget ({budget})", over + 1
+        print(f"{s['skill']:<22} {os.path.basename(s['path']):<42} {s['tokens']:>7}{flag}")
+        for link in s["linked"]:
+            print(f"{'':<22}   {os.path.relpath(link['path'], s['skill']):<40} {link['tokens']:>7}")
+        print(f"{'':<22} {'total with linked references':<42} {s['total_tokens']:>7}")
+        if s["scripts"]:
+            print(f"{'':<22} scripts (run, not read): "
+                  + ", ".join(os.path.relpath(l["path"], s["skill"]) for l in s["scripts"]))
+    startup = estimate_tokens(_render_index(skills))
+    print(f"\nindex: {startup} tokens for {len(skills)} skills "
+          f"(vs {sum(s['tokens'] for s in skills)} to load every SKILL.md) [{index.tokenizer}]")
+    if dups:
+        print(f"\nduplicated blocks ({sum(d['tokens'] for d in dups)} tokens):")
+        for d in dups:
+            scope = "cross-skill" if d["cross_skill"] else "same skill "
+            print(f"  {scope} {d['lines']:>3} lines ~{d['tokens']:>4} tok  {d['a']}  ==  {d['b']}")
+            print(f"              {d['preview']}")
+    if overlaps:
+        print(f"\noverlapping files ({sum(o['tokens'] for o in overlaps)} tokens):")
+        for o in overlaps:
+            scope = "cross-skill" if o["cross_skill"] else "same skill "
+            print(f"  {scope} {o['lines']:>3} lines ~{o['tokens']:>4} tok  {o['a']}  ~~  {o['b']}")
+    return 1 if over else 0
+
+
+def _render_index(skills: list[dict]) -> str:
+    return "".join(f"- {s['name'] or s['skill']} ({s['path']}): {s['description']}\n" for s in skills)
+
+
+def match(skills: list[dict], query: str) -> list[tuple[float, dict]]:
+    """Rank skills by word overlap between the query and their triggers/description (score 0-1)."""
+    words = set(re.findall(r"[a-z0-9]+", query.lower()))
+    ranked = []
+    for s in skills:
+        trigger_words = set(re.findall(r"[a-z0-9]+", " ".join(s["triggers"]).lower()))
+        desc_words = set(re.findall(r"[a-z0-9]+", (s["name"] + " " + s["description"]).lower()))
+        score = 2 * len(words & trigger_words) + len(words & desc_words)
+        if score:
+            # Best case: every query word is in the triggers (2) and the description (1).
+            ranked.append((score / (3 * len(words)), s))
+    ranked.sort(key=lambda r: -r[0])
+    return ranked
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", default=DEFAULT_ROOT, help=f"skills folder (default {DEFAULT_ROOT})")
+    parser.add_argument("--cache", help=f"cache file (default <root>/{CACHE_NAME})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="refresh the cache and show what was re-read")
+    p = sub.add_parser("index", help="compact skill list for agent startup")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("match", help="skills whose triggers match a request")
+    p.add_argument("query")
+    p = sub.add_parser("report", help="token cost per skill and duplicated content")
+    p.add_argument("--budget", type=int, help="flag (and exit 1) when a SKILL.md exceeds this many tokens")
+    p.add_argument("--min-lines", type=int, default=3, help="shortest duplicated run to flag (default 3)")
+    p.add_argument("--min-shared", type=int, default=MIN_SHARED,
+                   help=f"lines two files must share, in any order, to flag them (default {MIN_SHARED})")
+    p.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    index = Index(args.root, args.cache).refresh()
+    skills = index.skills()
+    if args.command == "build":
+        s = index.stats
+        print(f"{len(skills)} skills, {len(index.files)} files: {s['parsed']} parsed, {s['touched']} touched "
+              f"(same hash), {s['unchanged']} unchanged, {s['removed']} removed -> {index.cache_path}")
+    elif args.command == "index":
+        if args.json:
+            print(json.dumps([{k: s[k] for k in ("name", "path", "description", "triggers", "tokens")}
+                              for s in skills], indent=2))
+        else:
+            sys.stdout.write(_render_index(skills))
+    elif args.command == "match":
+        for score, s in match(skills, args.query)[:5]:
+            print(f"{score:.2f}  {s['name']:<22} {s['path']}")
+    else:
+        dups = index.duplicates(args.min_lines)
+        overlaps = index.overlaps(args.min_shared)
+        if args.json:
+            print(json.dumps({"tokenizer": index.tokenizer, "skills": skills, "duplicates": dups,
+                              "overlaps": overlaps}, indent=2))
+            return 1 if args.budget and any(s["tokens"] > args.budget for s in skills) else 0
+        return _print_report(index, skills, dups, overlaps, args.budget)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""Offline replay benchmark for the browser skills' extraction scripts.
+
+Serves a local stand-in for the X home timeline (timeline.html: the
+documented data-testid article tree, paged loading and a virtualized list)
+filled with synthetic posts or a recorded scrape, then drives the skills'
+own extraction code against it in headless Chromium:
+
+    scraper-eval      x-twitter-scraper SKILL.md Step 3 eval + Step 4 scroll/wait loop
+    summarizer-eval   x-feed-summarizer SKILL.md Step 3 eval + Step 4 scroll/wait loop
+    collector         x-twitter-scraper scripts/collect.py (collector.js)
+    snapshot          chrome-browser batch runner: snapshot -i, then snapshot -i --delta per scroll
+
+The eval scripts are read out of the SKILL.md files on every run, so the
+benchmark always measures what the skills currently say to run.
+
+    python3 bench/replay.py                              # all scenarios, 10-5000 posts
+    python3 bench/replay.py --sizes 10,100 --scenarios collector
+    python3 bench/replay.py --posts ~/feed.jsonl         # replay a recorded collect.py scrape
+
+Results go to bench/results.json with sorted keys and rounded values, so a
+regression shows up as a diff; the previous file is compared on stdout
+before it is overwritten. Nothing touches live X. The launched Chromium runs
+on a throwaway profile; ``--cdp`` instead drives whatever Chrome listens on
+that port, so point it at a separate instance, not the logged-in
+~/chrome-debug-profile on 9222.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, "chrome-browser", "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "x-twitter-scraper", "scripts"))
+import batch  # noqa: E402
+import collect  # noqa: E402
+from cdp import CDPError, Connection, Page, connect  # noqa: E402
+from ready import wait_ready  # noqa: E402
+
+ARTICLE = 'article[data-testid="tweet"]'
+SCENARIOS = ("scraper-eval", "summarizer-eval", "collector", "snapshot")
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+MAC_CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+WORDS = """model agent release open source weights benchmark latency browser skill eval scroll
+timeline feed thread launch paper dataset inference gpu training token context window prompt
+rust python typescript compiler runtime memory cache index query vector search demo video
+startup funding team hiring product design api sdk cli terminal workflow automation""".split()
+
+
+# -- timeline data ----------------------------------------------------
+
+def synthetic_posts(n: int, seed: int = 7) -> list[dict]:
+    """Deterministic posts with the mix a real feed has: reposts, links, cards, long and short text."""
+    rng = random.Random(seed * 100003 + n)
+    users = [(f"User {i}", f"user{i}") for i in range(max(10, n // 8))]
+    posts = []
+    for i in range(n):
+        user, handle = rng.choice(users)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.choice((6, 12, 24, 48))))
+        links, card = [], None
+        if rng.random() < 0.2:
+            slug = f"example.com/post-{rng.randrange(n // 5 + 1)}"
+            links.append({"text": slug, "href": f"https://t.co/{rng.getrandbits(40):010x}"})
+            if rng.random() < 0.5:
+                card = {"text": slug.split("/")[0], "href": links[0]["href"]}
+        posts.append({
+            "id": str(1_800_000_000_000_000_000 - i * 7919), "user": user, "handle": handle, "text": text,
+            "time": f"2026-10-{16 - i * 14 // max(n, 1):02d}T{(i * 37) % 24:02d}:{i % 60:02d}:00.000Z",
+            "context": f"{rng.choice(users)[0]} reposted" if rng.random() < 0.1 else "",
+            "links": links, "card": card,
+            "likes": rng.randrange(5000), "replies": rng.randrange(200), "reposts": rng.randrange(800),
+        })
+    return posts
+
+
+def recorded_posts(path: str, n: Optional[int]) -> list[dict]:
+    """collect.py / store.py records (JSONL or JSON array) as timeline posts."""
+    with open(os.path.expanduser(path), encoding="utf-8") as fh:
+        text = fh.read()
+    records = json.loads(text) if text.lstrip().startswith("[") else \
+        [json.loads(line) for line in text.splitlines() if line.strip()]
+    posts = []
+    for i, r in enumerate(records[:n] if n else records):
+        match = re.search(r"/(\w+)/status/(\d+)", r.get("link", ""))
+        links = [l if isinstance(l, dict) else {"text": l, "href": l} for l in r.get("links") or []]
+        posts.append({
+            "id": match.group(2) if match else str(i + 1), "user": r.get("user", "Unknown").split(" @")[0],
+            "handle": r.get("handle") or (match.group(1) if match else f"user{i}"),
+            "text": r.get("text", ""), "time": r.get("time") or "2026-01-01T00:00:00.000Z",
+            "context": r.get("context", ""), "links": links, "card": None,
+            "likes": 0, "replies": 0, "reposts": 0,
+        })
+    return posts
+
+
+class TimelineServer(ThreadingHTTPServer):
+    """Serves timeline.html and pages of ``posts`` with simulated network latency."""
+
+    daemon_threads = True
+
+    def __init__(self, posts: list[dict], page_size: int = 20, latency_ms: int = 150):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.posts, self.page_size, self.latency = posts, page_size, latency_ms / 1000
+        with open(os.path.join(HERE, "timeline.html"), "rb") as fh:
+            self.html = fh.read()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/home"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: TimelineServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        parts = urlsplit(self.path)
+        if parts.path == "/api/timeline":
+            cursor = int(parse_qs(parts.query).get("cursor", ["0"])[0])
+            time.sleep(self.server.latency)
+            end = cursor + self.server.page_size
+            body = json.dumps({"posts": self.server.posts[cursor:end],
+                               "next": end if end < len(self.server.posts) else None}).encode()
+            kind = "application/json"
+        elif parts.path == "/favicon.ico":
+            self.send_error(404)
+            return
+        else:
+            body, kind = self.server.html, "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+# -- browser ----------------------------------------------------------
+
+def find_chrome(explicit: Optional[str]) -> str:
+    for candidate in (explicit, os.environ.get("CHROME")):
+        if candidate:
+            return candidate
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.path.exists(MAC_CHROME):
+        return MAC_CHROME
+    raise SystemExit("✗ no Chrome/Chromium found — pass --chrome PATH or set $CHROME")
+
+
+class Browser:
+    """Headless Chromium on a throwaway profile, reached through cdp.py."""
+
+    def __init__(self, binary: str):
+        self.profile = tempfile.mkdtemp(prefix="replay-bench-")
+        self.proc = subprocess.Popen([
+            binary, "--headless=new", "--remote-debugging-port=0", f"--user-data-dir={self.profile}",
+            "--no-first-run", "--no-default-browser-check", "--disable-background-networking",
+            "--disable-extensions", "--window-size=1280,900", "about:blank",
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Chrome writes the port it picked to DevToolsActivePort in the profile.
+        port_file = os.path.join(self.profile, "DevToolsActivePort")
+        deadline = time.time() + 15
+        self.conn = None
+        while True:
+            try:
+                with open(port_file) as fh:
+                    self.port = int(fh.readline())
+                break
+            except (OSError, ValueError):
+                if time.time() > deadline or self.proc.poll() is not None:
+                    self.close()
+                    raise SystemExit(f"✗ {binary} did not start a DevTools endpoint")
+                time.sleep(0.05)
+        try:
+            self.conn = connect(self.port)
+            self.version = self.conn.send("Browser.getVersion")["product"]
+        except CDPError:
+            self.close()  # don't leave headless Chrome and its profile behind
+            raise
+
+    def close(self) -> None:
+        if self.conn:
+            self.conn.close()
+        self.proc.terminate()
+        try:
+            self.proc.wait(5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+
+class TimedPage(Page):
+    """A Page that records every Runtime.evaluate it makes and samples heap size."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.evals: list[tuple[str, float]] = []
+        self.peak_heap = 0
+        self.peak_nodes = 0
+
+    def evaluate(self, expression: str, await_promise: bool = True, timeout: Optional[float] = None):
+        start = time.perf_counter()
+        try:
+            return super().evaluate(expression, await_promise, timeout)
+        finally:
+            self.evals.append((expression, (time.perf_counter() - start) * 1000))
+
+    def sample(self) -> None:
+        metrics = {m["name"]: m["value"] for m in self.send("Performance.getMetrics")["metrics"]}
+        self.peak_heap = max(self.peak_heap, metrics.get("JSHeapUsedSize", 0))
+        self.peak_nodes = max(self.peak_nodes, int(metrics.get("Nodes", 0)))
+
+
+def open_timeline(conn: Connection, url: str) -> TimedPage:
+    page = TimedPage.open(conn)
+    page.send("Performance.enable")
+    page.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+    page.navigate(url)
+    wait_ready(page, "stable", ARTICLE, 5000)
+    page.send("HeapProfiler.collectGarbage")
+    page.sample()
+    return page
+
+
+# -- scenarios --------------------------------------------------------
+
+def skill_eval(skill_md: str, heading: str = "### Step 3") -> str:
+    """The first ``eval --stdin <<'EVALEOF'`` body after ``heading`` in a SKILL.md."""
+    with open(os.path.join(ROOT, skill_md), encoding="utf-8") as fh:
+        text = fh.read()
+    start = text.index(heading)
+    match = re.compile(r"<<'EVALEOF'\n(.*?)\nEVALEOF", re.S).search(text, start)
+    if not match:
+        raise SystemExit(f"✗ no EVALEOF block after {heading!r} in {skill_md}")
+    return match.group(1)
+
+
+def _status(link: str) -> Optional[str]:
+    match = re.search(r"/status/(\d+)", link or "")
+    return match.group(1) if match else None
+
+
+def run_eval_loop(page: TimedPage, script: str, max_rounds: int) -> dict:
+    """Step 3 eval, then Step 4 (scroll 2000, ready.py --stable --quiet 500 --timeout 1500), repeated."""
+    returned, ids, idle = 0, set(), 0
+    for _ in range(max_rounds):
+        records = json.loads(page.evaluate(script))
+        returned += len(records)
+        new = {_status(r.get("link")) for r in records} - ids - {None}
+        ids |= new
+        page.sample()
+        at_end = page.evaluate("__bench.done && scrollY + innerHeight >= document.body.scrollHeight - 2")
+        idle = 0 if new else idle + 1
+        if at_end and idle:
+            break
+        page.evaluate("window.scrollBy(0, 2000)")
+        wait_ready(page, "stable", ARTICLE, 1500, quiet_ms=500)
+    evals = [ms for expr, ms in page.evals if expr == script]
+    return {"returned": returned, "ids": ids, "eval_ms": evals}
+
+
+def run_collector(page: TimedPage, max_rounds: int) -> dict:
+    ids, returned = set(), 0
+    for record in collect.collect(page, rounds=max_rounds, idle_rounds=3):
+        returned += 1
+        ids.add(record["id"])
+        if returned % 50 == 0:
+            page.sample()
+    page.sample()
+    evals = [ms for expr, ms in page.evals if expr == "window.__xCollector.drain()"]
+    return {"returned": returned, "ids": ids, "eval_ms": evals}
+
+
+def run_snapshot(page: TimedPage, max_rounds: int) -> dict:
+    runner = batch.Runner(page.conn, page, out=io.StringIO())
+    full_ms, delta_ms, full_chars, delta_chars = [], [], [], []
+    for i in range(min(max_rounds, 20)):
+        start = time.perf_counter()
+        output = runner.cmd_snapshot(["-i"] + (["--delta"] if i else []), None)
+        (delta_ms if i else full_ms).append((time.perf_counter() - start) * 1000)
+        (delta_chars if i else full_chars).append(len(output))
+        page.sample()
+        page.evaluate("window.scrollBy(0, 2000)")
+        wait_ready(page, "stable", ARTICLE, 1500, quiet_ms=500)
+    return {"full_ms": full_ms, "delta_ms": delta_ms,
+            "full_chars": full_chars[0], "delta_chars": statistics.mean(delta_chars) if delta_chars else 0,
+            "nodes": len(runner.nodes)}
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(conn: Connection, server: TimelineServer, name: str) -> dict:
+    n = len(server.posts)
+    max_rounds = n // 4 + 10  # ~10 posts per 2000px scroll, with slack
+    page = open_timeline(conn, server.url)
+    start = time.perf_counter()
+    try:
+        if name == "snapshot":
+            raw = run_snapshot(page, max_rounds)
+        elif name == "collector":
+            raw = run_collector(page, max_rounds)
+        else:
+            skill = "x-twitter-scraper" if name == "scraper-eval" else "x-feed-summarizer"
+            raw = run_eval_loop(page, skill_eval(f"{skill}/SKILL.md"), max_rounds)
+        wall = time.perf_counter() - start
+        bench = page.evaluate("({...window.__bench})")
+    finally:
+        page.close()
+
+    result = {
+        "wall_s": round(wall, 2),
+        "peak_heap_mb": round(page.peak_heap / 2**20, 1),
+        "peak_dom_nodes": page.peak_nodes,
+        "max_mounted_articles": bench["maxMounted"],
+        "cdp_evals": len(page.evals),  # extraction plus readiness polling
+    }
+    if name == "snapshot":
+        result.update({
+            "snapshot_ms": round(statistics.median(raw["full_ms"]), 1),
+            "delta_ms_p50": round(_pct(raw["delta_ms"], 0.5), 1),
+            "delta_ms_p95": round(_pct(raw["delta_ms"], 0.95), 1),
+            "snapshot_chars": raw["full_chars"],
+            "delta_chars_mean": round(raw["delta_chars"]),
+            "nodes": raw["nodes"],
+        })
+        return result
+    truth = {p["id"] for p in server.posts[:bench["loaded"]]}
+    unique = raw["ids"] & truth
+    result.update({
+        "posts": len(unique),
+        "posts_per_s": round(len(unique) / wall, 1) if wall else 0.0,
+        "eval_ms_p50": round(_pct(raw["eval_ms"], 0.5), 1),
+        "eval_ms_p95": round(_pct(raw["eval_ms"], 0.95), 1),
+        "eval_ms_max": round(max(raw["eval_ms"], default=0.0), 1),
+        "duplicate_rate": round(1 - len(raw["ids"]) / raw["returned"], 3) if raw["returned"] else 0.0,
+        "miss_rate": round(1 - len(unique) / len(truth), 3) if truth else 0.0,
+    })
+    return result
+
+
+# -- output -----------------------------------------------------------
+
+KEY_METRICS = ("posts_per_s", "eval_ms_p50", "miss_rate", "peak_heap_mb", "delta_ms_p50")
+
+
+def _median_result(runs: list[dict]) -> dict:
+    return {k: (round(statistics.median(r[k] for r in runs), 3) if isinstance(runs[0][k], float)
+                else int(statistics.median(r[k] for r in runs))) for k in runs[0]}
+
+
+def compare(previous: dict, current: dict, out: Callable[[str], None] = print) -> None:
+    """One line per scenario/size: key metrics with % change from the previous results file."""
+    for scenario, sizes in sorted(current["results"].items()):
+        for size, metrics in sorted(sizes.items(), key=lambda kv: int(kv[0])):
+            old = previous.get("results", {}).get(scenario, {}).get(size, {})
+            cells = []
+            for key in KEY_METRICS:
+                if key not in metrics:
+                    continue
+                cell = f"{key}={metrics[key]}"
+                if old.get(key):
+                    change = (metrics[key] - old[key]) / old[key] * 100
+                    if abs(change) >= 5:
+                        cell += f" ({change:+.0f}%)"
+                cells.append(cell)
+            out(f"{scenario:<16} n={size:<5} " + "  ".join(cells))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="timeline sizes in posts (default 10,100,1000,5000)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--posts", help="replay a recorded scrape (collect.py JSONL or JSON array) instead of synthetic posts")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario; the median is reported (default 1)")
+    parser.add_argument("--latency", type=int, default=150, help="simulated ms per timeline page (default 150)")
+    parser.add_argument("--page-size", type=int, default=20, help="posts per timeline page (default 20)")
+    parser.add_argument("--chrome", help="Chrome/Chromium binary (default: $CHROME or the first one on PATH)")
+    parser.add_argument("--cdp", type=int, help="use an already-running Chrome on this port instead of launching one "
+                             "(not the logged-in debug Chrome on 9222)")
+    parser.add_argument("-o", "--output", default=os.path.join(HERE, "results.json"),
+                        help="results file (default bench/results.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    browser = None
+    try:
+        if args.cdp:
+            conn = connect(args.cdp)
+            try:
+                version = conn.send("Browser.getVersion")["product"]
+            except CDPError:
+                conn.close()
+                raise
+        else:
+            browser = Browser(find_chrome(args.chrome))
+            conn, version = browser.conn, browser.version
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+
+    current = {
+        "environment": {"browser": version, "python": platform.python_version(), "platform": sys.platform},
+        "config": {"latency_ms": args.latency, "page_size": args.page_size, "repeat": args.repeat,
+                   "source": os.path.basename(args.posts) if args.posts else "synthetic"},
+        "results": {},
+    }
+    try:
+        for size in sizes:
+            posts = recorded_posts(args.posts, size) if args.posts else synthetic_posts(size)
+            server = TimelineServer(posts, args.page_size, args.latency)
+            try:
+                for scenario in scenarios:
+                    runs = [run_scenario(conn, server, scenario) for _ in range(args.repeat)]
+                    result = _median_result(runs)
+                    current["results"].setdefault(scenario, {})[str(len(posts))] = result
+                    print(f"  {scenario:<16} n={len(posts):<5} {result['wall_s']:>7.1f}s", file=sys.stderr)
+            finally:
+                server.shutdown()
+                server.server_close()
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if browser:
+            browser.close()
+        else:
+            conn.close()
+
+    previous = {}
+    if os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as fh:
+            previous = json.load(fh)
+    compare(previous, current)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(current, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    print(f"wrote {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,841 @@
+"""Run a chrome-browser command script over one persistent CDP connection.
+
+Each line is an ``agent-browser`` command from references/commands.md,
+with or without the ``agent-browser --cdp 9222`` prefix. Unlike a chain of
+CLI calls, the whole script shares one websocket, so no step pays process
+startup or CDP re-attach.
+
+    python3 batch.py workflow.ab --trace trace.json
+    python3 batch.py - <<'EOF'
+    open https://example.com/login
+    snapshot -i
+    email = ref textbox "Email"
+    fill ${email} "user@example.com"
+    press Enter
+    EOF
+
+Script syntax:
+    # comment                 full-line comments and blank lines are skipped
+    NAME = <command>          capture the command's output into NAME
+    ${NAME}                   substitute a captured value into any argument
+    ref <role> ["name"]       print the ref of a node in the last snapshot
+    until --stable SEL        adaptive wait (see ready.py); --selector, --enabled, --fn
+    eval <<'EOF' ... EOF      heredoc body becomes the script for eval
+    a && b                    pasted chains run as separate steps
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import re
+import shlex
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cdp import CDPError, Page, active_target_id, connect, page_targets  # noqa: E402
+from ready import CONDITIONS, DEFAULT_QUIET_MS, wait_ready  # noqa: E402
+
+DEFAULT_TIMEOUT_MS = 25000
+
+INTERACTIVE_ROLES = {
+    "button", "link", "textbox", "searchbox", "checkbox", "radio", "combobox",
+    "listbox", "menuitem", "menuitemcheckbox", "menuitemradio", "option",
+    "slider", "spinbutton", "switch", "tab", "treeitem",
+}
+
+_KEYS = {
+    "Enter": (13, "\r"), "Tab": (9, ""), "Escape": (27, ""), "Backspace": (8, ""),
+    "Delete": (46, ""), "ArrowUp": (38, ""), "ArrowDown": (40, ""),
+    "ArrowLeft": (37, ""), "ArrowRight": (39, ""), "Home": (36, ""), "End": (35, ""),
+    "PageUp": (33, ""), "PageDown": (34, ""), "Space": (32, " "),
+}
+_MODIFIERS = {"Alt": 1, "Control": 2, "Meta": 4, "Shift": 8}
+
+_ASSIGN = re.compile(r"^([A-Za-z_]\w*)\s*=\s*(\S.*)$")
+_VAR = re.compile(r"\$\{(\w+)\}")
+_REF = re.compile(r"^@?(e\d+)$")
+
+
+class StepError(Exception):
+    """A script step could not be parsed or executed."""
+
+
+@dataclass
+class Step:
+    lineno: int
+    argv: list[str]
+    var: Optional[str] = None
+    body: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return " ".join(shlex.quote(a) for a in self.argv)
+
+
+@dataclass
+class SnapshotNode:
+    ref: Optional[str]
+    backend_id: Optional[int]
+    role: str
+    name: str
+    depth: int
+    props: dict[str, Any] = field(default_factory=dict)
+    ax_id: str = ""
+
+    @property
+    def key(self) -> Any:
+        """Identity across snapshots: the DOM node if there is one."""
+        return self.backend_id or f"ax:{self.ax_id}"
+
+    @property
+    def signature(self) -> tuple:
+        return (self.role, self.name, tuple(sorted((k, str(v)) for k, v in self.props.items())))
+
+    def render(self, indent: bool) -> str:
+        parts = [f"@{self.ref}" if self.ref else "-", f"[{self.role}]"]
+        if self.name:
+            parts.append(json.dumps(self.name[:100], ensure_ascii=False))
+        for key, value in self.props.items():
+            if value is True:
+                parts.append(f"[{key}]")
+            else:
+                parts.append(f"{key}={json.dumps(str(value)[:60], ensure_ascii=False)}")
+        return ("  " * self.depth if indent else "") + " ".join(parts)
+
+
+def parse_script(lines: list[str]) -> list[Step]:
+    """Turn script text into steps, resolving heredocs, continuations and ``&&`` chains."""
+    steps: list[Step] = []
+    i = 0
+    while i < len(lines):
+        lineno, line = i + 1, lines[i].rstrip("\n")
+        i += 1
+        while line.endswith("\\") and i < len(lines):
+            line = line[:-1] + " " + lines[i].strip()
+            i += 1
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        var = None
+        match = _ASSIGN.match(stripped)
+        if match:
+            var, stripped = match.group(1), match.group(2)
+        try:
+            tokens = shlex.split(stripped)
+        except ValueError as exc:
+            raise StepError(f"line {lineno}: {exc}") from exc
+        body = None
+        if tokens and tokens[-1].startswith("<<"):
+            delim = tokens.pop()[2:].lstrip("-")
+            collected = []
+            while i < len(lines) and lines[i].strip() != delim:
+                collected.append(lines[i].rstrip("\n"))
+                i += 1
+            if i >= len(lines):
+                raise StepError(f"line {lineno}: heredoc {delim!r} is never closed")
+            i += 1
+            body = "\n".join(collected)
+        chain: list[list[str]] = [[]]
+        for token in tokens:
+            if token == "&&":
+                chain.append([])
+            else:
+                chain[-1].append(token)
+        for n, argv in enumerate(chain):
+            argv = _strip_prefix(argv)
+            if not argv:
+                continue
+            last = n == len(chain) - 1
+            if argv[0] not in COMMANDS:
+                raise StepError(f"line {lineno}: unsupported command {argv[0]!r}")
+            steps.append(Step(lineno, argv, var if last else None, body if last else None))
+    return steps
+
+
+def _strip_prefix(argv: list[str]) -> list[str]:
+    """Drop a pasted ``agent-browser --cdp 9222`` prefix."""
+    if argv and argv[0] == "agent-browser":
+        argv = argv[1:]
+        while argv and argv[0].startswith("--"):
+            argv = argv[2:] if argv[0] == "--cdp" else argv[1:]
+    return argv
+
+
+def _glob_to_regex(glob: str) -> str:
+    """URL glob as used by ``wait --url``: ``**`` crosses slashes, ``*`` does not."""
+    parts = glob.split("**")
+    return "^" + ".*".join(re.escape(p).replace(r"\*", "[^/]*") for p in parts) + "$"
+
+
+def _pop_flag(args: list[str], flag: str) -> bool:
+    if flag in args:
+        args.remove(flag)
+        return True
+    return False
+
+
+def _pop_option(args: list[str], flag: str, default: Optional[str] = None) -> Optional[str]:
+    if flag in args:
+        i = args.index(flag)
+        if i + 1 >= len(args):
+            raise StepError(f"{flag} needs a value")
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+    return default
+
+
+def _need(args: list[str], n: int, usage: str) -> None:
+    if len(args) < n:
+        raise StepError(usage)
+
+
+def _number(value: str, what: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise StepError(f"{what} must be a whole number, got {value!r}") from None
+
+
+class Runner:
+    """Executes steps against one attached tab, keeping refs and variables between steps."""
+
+    def __init__(self, conn, page: Page, out=sys.stdout):
+        self.conn = conn
+        self.page = page
+        self.out = out
+        self.vars: dict[str, str] = {}
+        self.refs: dict[str, int] = {}
+        self.nodes: list[SnapshotNode] = []
+        self.meta: dict[str, Any] = {}
+        # Refs are keyed by backend DOM node ID, so a node keeps its ref for
+        # as long as it stays in the document, across any number of snapshots.
+        self._ref_of: dict[int, str] = {}
+        self._ref_counter = 0
+        self._previous: dict[tuple, tuple[Any, dict[Any, SnapshotNode]]] = {}
+        self._document: Any = None  # performance.timeOrigin the current refs belong to
+        self._gone: set[str] = set()  # refs a later snapshot reported as removed
+
+    # -- plumbing -----------------------------------------------------
+
+    def run(self, step: Step) -> str:
+        self.meta = {}
+        argv = [_VAR.sub(self._lookup, a) for a in step.argv]
+        # Heredoc bodies are usually JS, where ${...} is a template literal:
+        # only substitute names the script actually captured.
+        body = step.body
+        if body is not None:
+            body = _VAR.sub(lambda m: self.vars.get(m.group(1), m.group(0)), body)
+        handler: Callable[..., Any] = COMMANDS[argv[0]]
+        result = handler(self, argv[1:], body)
+        return "" if result is None else str(result)
+
+    def _lookup(self, match: "re.Match[str]") -> str:
+        name = match.group(1)
+        if name not in self.vars:
+            raise StepError(f"${{{name}}} is not set")
+        return self.vars[name]
+
+    def _object(self, target: str) -> str:
+        """Remote object ID for a ``@ref`` or CSS selector."""
+        ref = _REF.match(target)
+        if ref:
+            backend_id = self.refs.get(ref.group(1))
+            if backend_id is None and ref.group(1) in self._gone:
+                raise StepError(f"ref @{ref.group(1)} is gone — its element left the page")
+            if backend_id is None:
+                raise StepError(f"unknown ref @{ref.group(1)} — run snapshot -i first")
+            try:
+                object_id = self.page.resolve(backend_id)
+                # A detached node can stay alive (re-rendered lists); acting on it misses silently.
+                connected = self.page.call(object_id, "function() { return this.isConnected; }")
+            except CDPError as exc:
+                raise StepError(f"ref @{ref.group(1)} is gone — its element left the page") from exc
+            if not connected:
+                raise StepError(f"ref @{ref.group(1)} is gone — its element left the page")
+            return object_id
+        result = self.page.send("Runtime.evaluate", {
+            "expression": f"document.querySelector({json.dumps(target)})",
+        })
+        obj = result.get("result", {})
+        if obj.get("subtype") == "null" or "objectId" not in obj:
+            raise StepError(f"no element matches {target!r}")
+        return obj["objectId"]
+
+    def _center(self, object_id: str) -> tuple[float, float]:
+        x, y, w, h = self.page.call(object_id, """function() {
+            this.scrollIntoView({block: 'center', inline: 'center'});
+            const r = this.getBoundingClientRect();
+            return [r.left + r.width / 2, r.top + r.height / 2, r.width, r.height];
+        }""")
+        if not w and not h:
+            raise StepError("element has no visible box")
+        return x, y
+
+    def _mouse(self, kind: str, x: float, y: float, clicks: int = 1) -> None:
+        self.page.send("Input.dispatchMouseEvent", {
+            "type": kind, "x": x, "y": y, "button": "left",
+            "clickCount": clicks if kind != "mouseMoved" else 0,
+        })
+
+    def _click(self, object_id: str, clicks: int = 1) -> None:
+        x, y = self._center(object_id)
+        self._mouse("mouseMoved", x, y)
+        for n in range(1, clicks + 1):
+            self._mouse("mousePressed", x, y, n)
+            self._mouse("mouseReleased", x, y, n)
+
+    def _press(self, combo: str) -> None:
+        *mods, key = combo.split("+") if combo != "+" else ["+"]
+        modifiers = sum(_MODIFIERS.get(m, 0) for m in mods)
+        if key in _KEYS:
+            code, text = _KEYS[key]
+            params = {"key": " " if key == "Space" else key, "code": key, "windowsVirtualKeyCode": code}
+        elif len(key) == 1:
+            text = key
+            params = {"key": key, "code": f"Key{key.upper()}" if key.isalpha() else "",
+                      "windowsVirtualKeyCode": ord(key.upper())}
+        else:
+            raise StepError(f"unknown key {key!r}")
+        if modifiers & ~_MODIFIERS["Shift"]:
+            text = ""
+        self.page.send("Input.dispatchKeyEvent", {"type": "keyDown", "modifiers": modifiers, "text": text, **params})
+        self.page.send("Input.dispatchKeyEvent", {"type": "keyUp", "modifiers": modifiers, **params})
+
+    def _timeout(self, args: list[str]) -> float:
+        return _number(_pop_option(args, "--timeout", str(DEFAULT_TIMEOUT_MS)), "--timeout") / 1000
+
+    # -- navigation ---------------------------------------------------
+
+    def cmd_open(self, args, body):
+        if not args:
+            raise StepError("open needs a URL")
+        url = args[0] if "://" in args[0] or args[0].startswith("about:") else "https://" + args[0]
+        self.page.navigate(url)
+        self._new_document()
+
+    def cmd_back(self, args, body):
+        self._history(-1)
+
+    def cmd_forward(self, args, body):
+        self._history(1)
+
+    def _history(self, delta: int) -> None:
+        history = self.page.send("Page.getNavigationHistory")
+        index = history["currentIndex"] + delta
+        if not 0 <= index < len(history["entries"]):
+            raise StepError("no history entry in that direction")
+        loaded = self.page.expect("Page.loadEventFired")
+        self.page.send("Page.navigateToHistoryEntry", {"entryId": history["entries"][index]["id"]})
+        loaded.wait()
+        self._new_document()
+
+    def cmd_reload(self, args, body):
+        loaded = self.page.expect("Page.loadEventFired")
+        self.page.send("Page.reload")
+        loaded.wait()
+        self._new_document()
+
+    def cmd_close(self, args, body):
+        self.page.close()
+
+    # -- snapshot -----------------------------------------------------
+
+    def cmd_snapshot(self, args, body):
+        interactive = _pop_flag(args, "-i")
+        cursor = _pop_flag(args, "-C")
+        compact = _pop_flag(args, "-c")
+        delta = _pop_flag(args, "--delta")
+        _pop_flag(args, "--json")
+        depth = _pop_option(args, "-d")
+        scope = _pop_option(args, "-s")
+        if args:
+            scope = args[0]
+        depth_n = _number(depth, "-d") if depth else None
+        title, url, document = self.page.evaluate("[document.title, location.href, performance.timeOrigin]")
+        fresh = document != self._document  # navigated since the last snapshot, e.g. by a click
+        if fresh:
+            self._new_document()
+            self._document = document
+        self.nodes = self._snapshot(interactive, cursor, compact, depth_n, scope)
+        self.refs.update((n.ref, n.backend_id) for n in self.nodes if n.ref)
+        current = {n.key: n for n in self.nodes}
+        options = (interactive, cursor, compact, depth, scope)
+        before = self._previous.get(options)
+        self._previous[options] = (document, current)
+        if before and not fresh:  # nodes this snapshot reports as removed lose their refs
+            gone = {n.ref for k, n in before[1].items() if k not in current and n.ref}
+            self.refs = {r: b for r, b in self.refs.items() if r not in gone}
+            self._gone |= gone
+
+        lines = [f"Page: {title}", f"URL: {url}"]
+        if delta and before and not fresh:
+            lines += self._render_delta(before[1], current, indent=not interactive)
+        else:
+            if delta:
+                lines.append("Delta: " + ("new document" if before else "no previous snapshot") + " — full snapshot")
+            lines.append("")
+            lines += [n.render(indent=not interactive) for n in self.nodes]
+        output = "\n".join(lines)
+        self.meta.update(nodes=len(self.nodes), chars=len(output))
+        return output
+
+    def _render_delta(self, before: dict, after: dict, indent: bool) -> list[str]:
+        """Added, removed and changed nodes between two snapshots taken with the same options."""
+        added = [n for k, n in after.items() if k not in before]
+        removed = [n for k, n in before.items() if k not in after]
+        changed = [n for k, n in after.items() if k in before and before[k].signature != n.signature]
+        unchanged = len(after) - len(added) - len(changed)
+        self.meta["delta"] = {"added": len(added), "removed": len(removed), "changed": len(changed)}
+        lines = [f"Delta: +{len(added)} -{len(removed)} ~{len(changed)} ({unchanged} unchanged)", ""]
+        lines += ["+ " + n.render(indent) for n in added]
+        lines += ["- " + n.render(indent) for n in removed]
+        lines += ["~ " + n.render(indent) for n in changed]
+        return lines
+
+    def _ref_for(self, backend_id: int) -> str:
+        ref = self._ref_of.get(backend_id)
+        if ref is None:
+            self._ref_counter += 1
+            ref = self._ref_of[backend_id] = f"e{self._ref_counter}"
+        return ref
+
+    def _snapshot(self, interactive: bool, cursor: bool, compact: bool,
+                  max_depth: Optional[int], scope: Optional[str]) -> list[SnapshotNode]:
+        ax_nodes = self.page.send("Accessibility.getFullAXTree")["nodes"]
+        by_id = {n["nodeId"]: n for n in ax_nodes}
+        roots = [n for n in ax_nodes if not n.get("parentId") or n["parentId"] not in by_id]
+        if scope:
+            scope_id = self._backend_id(scope)
+            roots = [n for n in ax_nodes if n.get("backendDOMNodeId") == scope_id]
+            if not roots:
+                raise StepError(f"{scope!r} is not in the accessibility tree")
+
+        result: list[SnapshotNode] = []
+
+        def visit(node: dict, depth: int) -> None:
+            role = (node.get("role") or {}).get("value", "")
+            name = str((node.get("name") or {}).get("value", "")).strip()
+            props = {p["name"]: p.get("value", {}).get("value") for p in node.get("properties", [])}
+            keep = False
+            if not node.get("ignored") and role not in ("InlineTextBox", "LineBreak"):
+                if role in INTERACTIVE_ROLES or (cursor and props.get("focusable") and role == "generic"):
+                    keep = True
+                elif not interactive:
+                    keep = bool(name) or not (compact and role in ("generic", "none", "StaticText"))
+            if keep:
+                ref = None
+                if node.get("backendDOMNodeId") and (role in INTERACTIVE_ROLES or not interactive or cursor):
+                    ref = self._ref_for(node["backendDOMNodeId"])
+                shown = {k: v for k, v in props.items()
+                         if k in ("disabled", "checked", "expanded", "selected", "required") and v not in (None, False, "false")}
+                if role in ("textbox", "searchbox", "combobox") and (node.get("value") or {}).get("value"):
+                    shown["value"] = node["value"]["value"]
+                result.append(SnapshotNode(ref, node.get("backendDOMNodeId"), role, name, depth, shown,
+                                           ax_id=node["nodeId"]))
+            if max_depth is not None and depth >= max_depth:
+                return
+            for child_id in node.get("childIds", []):
+                child = by_id.get(child_id)
+                if child:
+                    visit(child, depth + 1 if keep else depth)
+
+        for root in roots:
+            visit(root, 0)
+        return result
+
+    def _backend_id(self, target: str) -> int:
+        ref = _REF.match(target)
+        if ref and ref.group(1) in self.refs:
+            return self.refs[ref.group(1)]
+        object_id = self._object(target)
+        return self.page.send("DOM.describeNode", {"objectId": object_id})["node"]["backendNodeId"]
+
+    def cmd_ref(self, args, body):
+        exact = _pop_flag(args, "--exact")
+        if not args:
+            raise StepError("ref needs a role")
+        role, name = args[0], (args[1] if len(args) > 1 else None)
+        for node in self.nodes:
+            if not node.ref or node.role != role:
+                continue
+            if name is None or (node.name == name if exact else name.lower() in node.name.lower()):
+                return f"@{node.ref}"
+        wanted = f'{role} "{name}"' if name is not None else role
+        raise StepError(f"no {wanted} in the last snapshot")
+
+    # -- interaction --------------------------------------------------
+
+    def cmd_click(self, args, body):
+        new_tab = _pop_flag(args, "--new-tab")
+        _need(args, 1, "click needs a target")
+        if new_tab:
+            href = self.page.call(self._object(args[0]), "function() { return this.href || ''; }")
+            if not href:
+                raise StepError("--new-tab needs a link")
+            self.conn.send("Target.createTarget", {"url": href, "background": True})
+            return None
+        self._click(self._object(args[0]))
+
+    def cmd_dblclick(self, args, body):
+        _need(args, 1, "dblclick needs a target")
+        self._click(self._object(args[0]), clicks=2)
+
+    def cmd_hover(self, args, body):
+        _need(args, 1, "hover needs a target")
+        x, y = self._center(self._object(args[0]))
+        self._mouse("mouseMoved", x, y)
+
+    def cmd_focus(self, args, body):
+        _need(args, 1, "focus needs a target")
+        self.page.call(self._object(args[0]), "function() { this.focus(); }")
+
+    def cmd_fill(self, args, body):
+        if len(args) < 2:
+            raise StepError("fill needs a target and text")
+        object_id = self._object(args[0])
+        self.page.call(object_id, """function() {
+            this.focus();
+            if (typeof this.select === 'function') this.select();
+            else document.execCommand('selectAll');
+        }""")
+        if args[1]:
+            self.page.send("Input.insertText", {"text": args[1]})
+        else:
+            self._press("Delete")
+
+    def cmd_type(self, args, body):
+        if len(args) < 2:
+            raise StepError("type needs a target and text")
+        self.page.call(self._object(args[0]), "function() { this.focus(); }")
+        self.page.send("Input.insertText", {"text": args[1]})
+
+    def cmd_press(self, args, body):
+        if not args:
+            raise StepError("press needs a key")
+        self._press(args[0])
+
+    def cmd_check(self, args, body):
+        _need(args, 1, "check needs a target")
+        self._set_checked(args[0], True)
+
+    def cmd_uncheck(self, args, body):
+        _need(args, 1, "uncheck needs a target")
+        self._set_checked(args[0], False)
+
+    def _set_checked(self, target: str, wanted: bool) -> None:
+        object_id = self._object(target)
+        state = self.page.call(object_id, "function() { return this.checked ?? this.getAttribute('aria-checked') === 'true'; }")
+        if bool(state) != wanted:
+            self._click(object_id)
+
+    def cmd_select(self, args, body):
+        _need(args, 2, "select needs a target and at least one value")
+        matched = self.page.call(self._object(args[0]), """function(values) {
+            let n = 0;
+            for (const o of this.options) {
+                o.selected = values.includes(o.value) || values.includes(o.label);
+                n += o.selected;
+            }
+            this.dispatchEvent(new Event('input', {bubbles: true}));
+            this.dispatchEvent(new Event('change', {bubbles: true}));
+            return n;
+        }""", args[1:])
+        if not matched:
+            raise StepError(f"no option matches {args[1:]}")
+
+    def cmd_scroll(self, args, body):
+        direction = args[0] if args else "down"
+        amount = _number(args[1], "scroll amount") if len(args) > 1 else 300
+        dx, dy = {"down": (0, amount), "up": (0, -amount),
+                  "right": (amount, 0), "left": (-amount, 0)}.get(direction, (None, None))
+        if dx is None:
+            raise StepError(f"unknown scroll direction {direction!r}")
+        self.page.evaluate(f"window.scrollBy({dx}, {dy})")
+
+    def cmd_scrollintoview(self, args, body):
+        _need(args, 1, "scrollintoview needs a target")
+        self.page.call(self._object(args[0]), "function() { this.scrollIntoView({block: 'center'}); }")
+
+    # -- information --------------------------------------------------
+
+    def cmd_get(self, args, body):
+        _pop_flag(args, "--json")
+        if not args:
+            raise StepError("get needs a property")
+        what, rest = args[0], args[1:]
+        if what == "title":
+            return self.page.evaluate("document.title")
+        if what == "url":
+            return self.page.evaluate("location.href")
+        if what == "count":
+            _need(rest, 1, "get count needs a selector")
+            return self.page.evaluate(f"document.querySelectorAll({json.dumps(rest[0])}).length")
+        if what not in ("text", "html", "value", "attr", "box"):
+            raise StepError(f"unsupported get {what!r}")
+        if not rest:
+            raise StepError(f"get {what} needs a target")
+        if what == "attr":
+            _need(rest, 2, "get attr needs a target and an attribute name")
+        object_id = self._object(rest[0])
+        if what == "text":
+            return self.page.call(object_id, "function() { return this.innerText ?? this.textContent; }")
+        if what == "html":
+            return self.page.call(object_id, "function() { return this.innerHTML; }")
+        if what == "value":
+            return self.page.call(object_id, "function() { return this.value ?? ''; }")
+        if what == "attr":
+            return self.page.call(object_id, "function(n) { return this.getAttribute(n); }", rest[1])
+        if what == "box":
+            return json.dumps(self.page.call(object_id, """function() {
+                const r = this.getBoundingClientRect();
+                return {x: r.x, y: r.y, width: r.width, height: r.height};
+            }"""))
+
+    def cmd_is(self, args, body):
+        if len(args) < 2:
+            raise StepError("is needs a state and a target")
+        checks = {
+            "visible": "function() { const r = this.getBoundingClientRect(); return r.width > 0 && r.height > 0 && getComputedStyle(this).visibility !== 'hidden'; }",
+            "enabled": "function() { return !this.disabled && this.getAttribute('aria-disabled') !== 'true'; }",
+            "checked": "function() { return !!(this.checked ?? this.getAttribute('aria-checked') === 'true'); }",
+        }
+        if args[0] not in checks:
+            raise StepError(f"unsupported is {args[0]!r}")
+        return "true" if self.page.call(self._object(args[1]), checks[args[0]]) else "false"
+
+    def cmd_eval(self, args, body):
+        if _pop_flag(args, "-b"):
+            _need(args, 1, "eval -b needs a base64 script")
+            try:
+                script = base64.b64decode(args[0], validate=True).decode()
+            except ValueError as exc:  # binascii.Error and UnicodeDecodeError are both ValueErrors
+                raise StepError(f"eval -b: not a base64 UTF-8 script ({exc})") from None
+        elif _pop_flag(args, "--stdin") or body is not None:
+            if body is None:
+                raise StepError("eval --stdin needs a heredoc body in batch mode")
+            script = body
+        else:
+            script = " ".join(args)
+        value = self.page.evaluate(script)
+        return value if isinstance(value, str) else json.dumps(value)
+
+    # -- wait ---------------------------------------------------------
+
+    def cmd_wait(self, args, body):
+        timeout = self._timeout(args)
+        text = _pop_option(args, "--text")
+        url = _pop_option(args, "--url")
+        fn = _pop_option(args, "--fn")
+        load = _pop_option(args, "--load")
+        if text is not None:
+            self.page.wait_for(f"document.body && document.body.innerText.includes({json.dumps(text)})", timeout)
+        elif url is not None:
+            self.page.wait_for(f"new RegExp({json.dumps(_glob_to_regex(url))}).test(location.href)", timeout)
+        elif fn is not None:
+            self.page.wait_for(f"!!({fn})", timeout)
+        elif load is not None:
+            self._wait_load(load, timeout)
+        elif args and args[0].isdigit():
+            time.sleep(int(args[0]) / 1000)
+        elif args and _REF.match(args[0]):
+            self._object(args[0])
+        elif args:
+            self.page.wait_for(f"document.querySelector({json.dumps(args[0])})", timeout)
+        else:
+            raise StepError("wait needs milliseconds, a target, or an option")
+
+    def _wait_load(self, state: str, timeout: float) -> None:
+        if state in ("load", "domcontentloaded"):
+            ready = "complete" if state == "load" else "interactive"
+            self.page.wait_for(f"['{ready}', 'complete'].includes(document.readyState)", timeout)
+            return
+        if state != "networkidle":
+            raise StepError(f"unknown load state {state!r}")
+        inflight: set[str] = set()
+        last_change = [time.perf_counter()]
+
+        def started(params, session_id):
+            if session_id == self.page.session_id:
+                inflight.add(params["requestId"])
+                last_change[0] = time.perf_counter()
+
+        def finished(params, session_id):
+            if session_id == self.page.session_id:
+                inflight.discard(params["requestId"])
+                last_change[0] = time.perf_counter()
+
+        events = [("Network.requestWillBeSent", started), ("Network.loadingFinished", finished),
+                  ("Network.loadingFailed", finished)]
+        for method, callback in events:
+            self.conn.on(method, callback)
+        self.page.send("Network.enable")
+        try:
+            deadline = time.perf_counter() + timeout
+            while not (not inflight and time.perf_counter() - last_change[0] >= 0.5):
+                if time.perf_counter() >= deadline:
+                    raise StepError(f"networkidle not reached in {timeout * 1000:.0f}ms ({len(inflight)} requests in flight)")
+                time.sleep(0.05)
+        finally:
+            self.page.send("Network.disable")
+            for method, callback in events:
+                self.conn.off(method, callback)
+
+    def cmd_until(self, args, body):
+        timeout_ms = _number(_pop_option(args, "--timeout", "5000"), "--timeout")
+        quiet_ms = _number(_pop_option(args, "--quiet", str(DEFAULT_QUIET_MS)), "--quiet")
+        strict = _pop_flag(args, "--strict")
+        if len(args) != 2 or not args[0].startswith("--") or args[0][2:] not in CONDITIONS:
+            raise StepError("until needs one of " + ", ".join(f"--{c}" for c in CONDITIONS) + " and a target")
+        result = wait_ready(self.page, args[0][2:], args[1], timeout_ms, quiet_ms)
+        self.meta = {"ready": result.ok, "waited_ms": result.waited_ms, "timeout_ms": timeout_ms}
+        if not result.ok:
+            message = f"{result.condition} not ready after {timeout_ms}ms: {args[1]}"
+            if strict:
+                raise StepError(message)
+            print(f"⚠ {message}", file=sys.stderr)
+        return None
+
+    # -- capture ------------------------------------------------------
+
+    def cmd_screenshot(self, args, body):
+        full = _pop_flag(args, "--full")
+        path = args[0] if args else os.path.join(tempfile.gettempdir(), f"screenshot-{int(time.time() * 1000)}.png")
+        data = self.page.send("Page.captureScreenshot", {"format": "png", "captureBeyondViewport": full})["data"]
+        with open(path, "wb") as fh:
+            fh.write(base64.b64decode(data))
+        return path
+
+    def cmd_pdf(self, args, body):
+        if not args:
+            raise StepError("pdf needs an output path")
+        data = self.page.send("Page.printToPDF")["data"]
+        with open(args[0], "wb") as fh:
+            fh.write(base64.b64decode(data))
+        return args[0]
+
+    # -- tabs ---------------------------------------------------------
+
+    def cmd_tab(self, args, body):
+        tabs = page_targets(self.conn)
+        if not args:
+            return "\n".join(
+                f"{'*' if t['targetId'] == self.page.target_id else ' '} [{i}] {t['title']} - {t['url']}"
+                for i, t in enumerate(tabs))
+        if args[0] == "new":
+            self.page = Page.open(self.conn, args[1] if len(args) > 1 else "about:blank")
+            self.conn.send("Target.activateTarget", {"targetId": self.page.target_id})
+            self._forget_refs()
+            return None
+        if args[0] == "close":
+            if len(args) > 1 and (not args[1].isdigit() or int(args[1]) >= len(tabs)):
+                raise StepError(f"no tab {args[1]!r}")
+            target = tabs[int(args[1])]["targetId"] if len(args) > 1 else self.page.target_id
+            self.conn.send("Target.closeTarget", {"targetId": target})
+            if target == self.page.target_id:
+                remaining = [t for t in tabs if t["targetId"] != target]
+                if remaining:
+                    self._switch(remaining[0]["targetId"])
+            return None
+        if not args[0].isdigit() or int(args[0]) >= len(tabs):
+            raise StepError(f"no tab {args[0]!r}")
+        self._switch(tabs[int(args[0])]["targetId"])
+
+    def _switch(self, target_id: str) -> None:
+        self.page = Page.attach(self.conn, target_id)
+        self.conn.send("Target.activateTarget", {"targetId": target_id})
+        self._forget_refs()
+
+    def _new_document(self) -> None:
+        """Refs die with their document; ``_previous`` stays so --delta can say "new document"."""
+        self.refs, self.nodes, self._ref_of = {}, [], {}
+        self._gone = set()
+        self._document = None
+
+    def _forget_refs(self) -> None:
+        """Backend node IDs belong to one tab; drop them when the tab changes."""
+        self._new_document()
+        self._previous = {}
+
+    def cmd_echo(self, args, body):
+        return " ".join(args)
+
+
+COMMANDS: dict[str, Callable[..., Any]] = {
+    name[4:]: fn for name, fn in vars(Runner).items() if name.startswith("cmd_")
+}
+COMMANDS.update(goto=Runner.cmd_open, navigate=Runner.cmd_open)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("script", nargs="?", default="-", help="command file, or - for stdin (default)")
+    parser.add_argument("--cdp", type=int, default=9222, help="Chrome remote debugging port")
+    parser.add_argument("--trace", help="write the per-step latency trace as JSON here (- for stderr)")
+    parser.add_argument("--keep-going", action="store_true", help="continue after a failing step")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.script == "-" else open(args.script, encoding="utf-8")
+    with source:
+        lines = source.readlines()
+    try:
+        steps = parse_script(lines)
+    except StepError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    try:
+        conn = connect(args.cdp)
+        runner = Runner(conn, Page.attach(conn, active_target_id(args.cdp)))
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    trace: dict[str, Any] = {"cdp": args.cdp, "connect_ms": round((time.perf_counter() - started) * 1000, 1), "steps": []}
+
+    status = 0
+    try:
+        for n, step in enumerate(steps, 1):
+            t0 = time.perf_counter()
+            entry: dict[str, Any] = {"step": n, "line": step.lineno, "command": step.argv[0], "args": step.text[:200]}
+            try:
+                output = runner.run(step)
+                entry["ok"] = True
+                entry.update(runner.meta)
+            except (StepError, CDPError, OSError) as exc:  # OSError: screenshot/pdf paths
+                output = ""
+                entry.update(ok=False, error=str(exc))
+                print(f"✗ line {step.lineno}: {step.text[:80]}: {exc}", file=sys.stderr)
+                status = 1
+            entry["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            if step.var:
+                entry["var"] = step.var
+                runner.vars[step.var] = output.strip()
+            elif output:
+                print(output, file=runner.out, flush=True)
+            trace["steps"].append(entry)
+            if status and not args.keep_going:
+                break
+    finally:
+        # Close and write the trace even if a step dies with an unexpected error.
+        trace["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        conn.close()
+        if args.trace:
+            payload = json.dumps(trace, indent=2)
+            if args.trace == "-":
+                print(payload, file=sys.stderr)
+            else:
+                with open(args.trace, "w", encoding="utf-8") as fh:
+                    fh.write(payload + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""Minimal Chrome DevTools Protocol client over a single websocket.
+
+Stdlib only, so skill scripts run anywhere Python 3.9+ is available. One
+``Connection`` talks to the browser endpoint on port 9222 and every tab is
+driven through a flattened target session multiplexed over that socket, so
+a whole workflow pays for one connect instead of one per command.
+
+    conn = connect(9222)
+    page = Page.attach(conn, active_target_id(9222))
+    page.navigate("https://example.com")
+    print(page.evaluate("document.title"))
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import itertools
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class CDPError(RuntimeError):
+    """A CDP command failed, timed out, or the connection dropped."""
+
+
+class _WebSocket:
+    """Client side of RFC 6455, just enough for CDP text frames."""
+
+    def __init__(self, url: str, timeout: float):
+        parsed = urlparse(url)
+        host, port = parsed.hostname or "127.0.0.1", parsed.port or 80
+        path = parsed.path + ("?" + parsed.query if parsed.query else "")
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._send_lock = threading.Lock()
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self._sock.sendall(request.encode())
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = self._sock.recv(4096)
+            if not chunk:
+                raise CDPError("websocket handshake failed: connection closed")
+            response += chunk
+        head, _, self._buf = response.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        if len(lines[0].split()) < 2 or lines[0].split()[1] != "101":
+            raise CDPError(f"websocket handshake failed: {lines[0]}")
+        expected = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+        headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:])}
+        if headers.get("sec-websocket-accept") != expected:
+            raise CDPError("websocket handshake failed: bad Sec-WebSocket-Accept")
+        self._sock.settimeout(None)
+
+    def send(self, text: str) -> None:
+        self._send_frame(0x1, text.encode())
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        n = len(payload)
+        header = bytes([0x80 | opcode])
+        if n < 126:
+            header += bytes([0x80 | n])
+        elif n < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack(">H", n)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack(">Q", n)
+        mask = os.urandom(4)
+        keystream = (mask * (n // 4 + 1))[:n]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(keystream, "big")).to_bytes(n, "big")
+        with self._send_lock:
+            self._sock.sendall(header + mask + masked)
+
+    def _read(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self._sock.recv(max(65536, n - len(self._buf)))
+            if not chunk:
+                raise ConnectionError("websocket closed by peer")
+            self._buf += chunk
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
+    def recv(self) -> Optional[str]:
+        """Return the next text message, or None once the peer closes."""
+        parts = []
+        while True:
+            b1, b2 = self._read(2)
+            opcode, length = b1 & 0x0F, b2 & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", self._read(8))[0]
+            mask = self._read(4) if b2 & 0x80 else None
+            data = self._read(length)
+            if mask:
+                data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._send_frame(0xA, data)
+                continue
+            if opcode == 0xA:
+                continue
+            parts.append(data)
+            if b1 & 0x80:
+                return b"".join(parts).decode("utf-8")
+
+    def close(self) -> None:
+        try:
+            self._send_frame(0x8, b"")
+        except OSError:
+            pass
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class _Waiter:
+    """A one-shot subscription to a CDP event, registered before the action that fires it."""
+
+    def __init__(self, conn: "Connection", method: str, session_id: Optional[str],
+                 predicate: Optional[Callable[[dict], bool]]):
+        self._conn = conn
+        self.method = method
+        self.session_id = session_id
+        self.predicate = predicate
+        self.params: Optional[dict] = None
+        self._event = threading.Event()
+
+    def _offer(self, method: str, params: dict, session_id: Optional[str]) -> bool:
+        if method != self.method or (self.session_id and session_id != self.session_id):
+            return False
+        if self.predicate and not self.predicate(params):
+            return False
+        self.params = params
+        self._event.set()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> dict:
+        if not self._event.wait(self._conn.timeout if timeout is None else timeout):
+            self._conn._drop_waiter(self)
+            raise CDPError(f"timed out waiting for {self.method}")
+        return self.params or {}
+
+
+class Connection:
+    """One websocket to the browser; commands from any thread, events on a reader thread."""
+
+    def __init__(self, ws_url: str, timeout: float = 30.0):
+        self.timeout = timeout
+        self._ws = _WebSocket(ws_url, timeout)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending: dict[int, list] = {}
+        self._waiters: list[_Waiter] = []
+        self._listeners: dict[str, list[Callable[[dict, Optional[str]], None]]] = {}
+        self._closed: Optional[str] = None
+        self._reader = threading.Thread(target=self._read_loop, name="cdp-reader", daemon=True)
+        self._reader.start()
+
+    def send(self, method: str, params: Optional[dict] = None,
+             session_id: Optional[str] = None, timeout: Optional[float] = None) -> dict:
+        msg_id = next(self._ids)
+        slot: list[Any] = [threading.Event(), None]
+        with self._lock:
+            if self._closed:
+                raise CDPError(self._closed)
+            self._pending[msg_id] = slot
+        message: dict[str, Any] = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        try:
+            self._ws.send(json.dumps(message))
+        except OSError as exc:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            raise CDPError(f"{method}: {exc}") from exc
+        wait_for = self.timeout if timeout is None else timeout
+        if not slot[0].wait(wait_for):
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            raise CDPError(f"{method} timed out after {wait_for:g}s")
+        reply = slot[1]
+        if "error" in reply:
+            raise CDPError(f"{method}: {reply['error'].get('message', reply['error'])}")
+        return reply.get("result", {})
+
+    def on(self, method: str, callback: Callable[[dict, Optional[str]], None]) -> None:
+        """Call ``callback(params, session_id)`` for every ``method`` event (on the reader thread)."""
+        with self._lock:
+            self._listeners.setdefault(method, []).append(callback)
+
+    def off(self, method: str, callback: Callable[[dict, Optional[str]], None]) -> None:
+        with self._lock:
+            if callback in self._listeners.get(method, []):
+                self._listeners[method].remove(callback)
+
+    def expect(self, method: str, session_id: Optional[str] = None,
+               predicate: Optional[Callable[[dict], bool]] = None) -> _Waiter:
+        """Subscribe to the next matching event; call ``.wait()`` after triggering it."""
+        waiter = _Waiter(self, method, session_id, predicate)
+        with self._lock:
+            self._waiters.append(waiter)
+        return waiter
+
+    def _drop_waiter(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _read_loop(self) -> None:
+        reason = "connection closed"
+        try:
+            while True:
+                text = self._ws.recv()
+                if text is None:
+                    break
+                message = json.loads(text)
+                if "id" in message:
+                    with self._lock:
+                        slot = self._pending.pop(message["id"], None)
+                    if slot:
+                        slot[1] = message
+                        slot[0].set()
+                    continue
+                method, params = message.get("method"), message.get("params", {})
+                session_id = message.get("sessionId")
+                with self._lock:
+                    fired = [w for w in self._waiters if w._offer(method, params, session_id)]
+                    for waiter in fired:
+                        self._waiters.remove(waiter)
+                    listeners = list(self._listeners.get(method, ()))
+                for callback in listeners:
+                    callback(params, session_id)
+        except (OSError, ConnectionError, ValueError) as exc:
+            reason = f"connection lost: {exc}"
+        finally:
+            with self._lock:
+                self._closed = reason
+                pending, self._pending = self._pending, {}
+            for slot in pending.values():
+                slot[1] = {"error": {"message": reason}}
+                slot[0].set()
+
+    def close(self) -> None:
+        self._ws.close()
+        self._reader.join(timeout=2)
+
+
+class Session:
+    """A flattened target session sharing its parent ``Connection``."""
+
+    def __init__(self, conn: Connection, session_id: str, target_id: str):
+        self.conn = conn
+        self.session_id = session_id
+        self.target_id = target_id
+
+    def send(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        return self.conn.send(method, params, self.session_id, timeout)
+
+    def expect(self, method: str, predicate: Optional[Callable[[dict], bool]] = None) -> _Waiter:
+        return self.conn.expect(method, self.session_id, predicate)
+
+
+class Page(Session):
+    """A tab, with the handful of helpers every skill script needs."""
+
+    @classmethod
+    def attach(cls, conn: Connection, target_id: str) -> "Page":
+        result = conn.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        page = cls(conn, result["sessionId"], target_id)
+        page.send("Page.enable")
+        return page
+
+    @classmethod
+    def open(cls, conn: Connection, url: str = "about:blank",
+             new_window: bool = False, background: bool = False) -> "Page":
+        """Open a new tab and attach to it."""
+        target_id = conn.send("Target.createTarget", {
+            "url": url, "newWindow": new_window, "background": background,
+        })["targetId"]
+        return cls.attach(conn, target_id)
+
+    def evaluate(self, expression: str, await_promise: bool = True, timeout: Optional[float] = None) -> Any:
+        result = self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+            "userGesture": True,
+        }, timeout)
+        if "exceptionDetails" in result:
+            raise CDPError(f"eval: {_exception_text(result['exceptionDetails'])}")
+        return result.get("result", {}).get("value")
+
+    def call(self, object_id: str, function: str, *args: Any) -> Any:
+        """Run ``function`` with ``this`` bound to a remote object and return its value."""
+        result = self.send("Runtime.callFunctionOn", {
+            "objectId": object_id,
+            "functionDeclaration": function,
+            "arguments": [{"value": a} for a in args],
+            "returnByValue": True,
+            "awaitPromise": True,
+            "userGesture": True,
+        })
+        if "exceptionDetails" in result:
+            raise CDPError(f"eval: {_exception_text(result['exceptionDetails'])}")
+        return result.get("result", {}).get("value")
+
+    def resolve(self, backend_node_id: int) -> str:
+        """Object ID for a backend DOM node, raising if it left the document."""
+        return self.send("DOM.resolveNode", {"backendNodeId": backend_node_id})["object"]["objectId"]
+
+    def navigate(self, url: str, timeout: Optional[float] = None) -> None:
+        loaded = self.expect("Page.loadEventFired")
+        result = self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            self.conn._drop_waiter(loaded)
+            raise CDPError(f"navigate {url}: {result['errorText']}")
+        if not result.get("loaderId"):
+            # Same-document navigation (hash change): no load event follows.
+            self.conn._drop_waiter(loaded)
+            return
+        loaded.wait(timeout)
+
+    def wait_for(self, expression: str, timeout: float, interval: float = 0.1) -> float:
+        """Poll ``expression`` until truthy; return seconds waited or raise on timeout."""
+        start = time.perf_counter()
+        while True:
+            if self.evaluate(expression):
+                return time.perf_counter() - start
+            if time.perf_counter() - start >= timeout:
+                raise CDPError(f"timed out after {timeout * 1000:.0f}ms waiting for {expression!r}")
+            time.sleep(interval)
+
+    def close(self) -> None:
+        self.conn.send("Target.closeTarget", {"targetId": self.target_id})
+
+
+def _exception_text(details: dict) -> str:
+    exc = details.get("exception") or {}
+    return exc.get("description") or details.get("text") or "exception"
+
+
+def _http_json(host: str, port: int, path: str, timeout: float = 5.0) -> Any:
+    with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=timeout) as resp:
+        return json.load(resp)
+
+
+def connect(port: int = 9222, host: str = "127.0.0.1", timeout: float = 30.0) -> Connection:
+    """Connect to the browser-level endpoint of a Chrome started with --remote-debugging-port."""
+    try:
+        info = _http_json(host, port, "/json/version")
+    except OSError as exc:
+        raise CDPError(f"no Chrome on {host}:{port} ({exc}) — run the chrome-browser setup first") from exc
+    return Connection(info["webSocketDebuggerUrl"], timeout)
+
+
+def active_target_id(port: int = 9222, host: str = "127.0.0.1") -> str:
+    """Target ID of the most recently focused tab (Chrome lists it first)."""
+    for target in _http_json(host, port, "/json/list"):
+        if target.get("type") == "page" and not target.get("url", "").startswith("devtools://"):
+            return target["id"]
+    raise CDPError("no open tabs — open one in the debug Chrome window first")
+
+
+def page_targets(conn: Connection) -> list[dict]:
+    """All tab targets, in Chrome's order."""
+    targets = conn.send("Target.getTargets")["targetInfos"]
+    return [t for t in targets if t["type"] == "page" and not t["url"].startswith("devtools://")]
@@ -0,0 +1,125 @@
+"""Adaptive readiness waits: return as soon as the page is ready.
+
+Replaces fixed ``wait 5000`` sleeps on sites that never reach networkidle
+(X/Twitter). The timeout is only an upper bound — a fast page returns in a
+few hundred ms — and every wait reports how long it actually took.
+
+    python3 ready.py --stable 'article[data-testid="tweet"]' --timeout 5000
+    python3 ready.py --selector '[data-testid="tweetTextarea_0"]' --timeout 4000
+    python3 ready.py --enabled '[data-testid="tweetButtonInline"]' --timeout 3000
+    python3 ready.py --fn 'document.title.includes("Home")'
+
+Conditions:
+    --stable SEL     at least one SEL matches and the match count has not
+                     changed for --quiet ms (content finished streaming in)
+    --selector SEL   SEL matches an element
+    --enabled SEL    SEL matches an element that is not disabled/aria-disabled
+    --fn EXPR        a JS expression is truthy
+
+Prints one JSON result line. A timeout is not an error unless --strict,
+so a readiness wait is never worse than the fixed sleep it replaces.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cdp import CDPError, Page, active_target_id, connect  # noqa: E402
+
+CONDITIONS = ("stable", "selector", "enabled", "fn")
+DEFAULT_QUIET_MS = 800
+POLL_INTERVAL = 0.05
+
+
+@dataclass
+class Ready:
+    condition: str
+    target: str
+    ok: bool
+    waited_ms: float
+    timeout_ms: int
+    value: Any = None
+
+
+def probe(condition: str, target: str) -> str:
+    """JS expression whose value the wait loop polls for ``condition``."""
+    sel = json.dumps(target)
+    if condition == "stable":
+        return f"document.querySelectorAll({sel}).length"
+    if condition == "selector":
+        return f"!!document.querySelector({sel})"
+    if condition == "enabled":
+        return (f"(() => {{ const el = document.querySelector({sel}); "
+                "return !!el && !el.disabled && el.getAttribute('aria-disabled') !== 'true'; })()")
+    if condition == "fn":
+        return f"!!({target})"
+    raise ValueError(f"unknown readiness condition {condition!r}")
+
+
+def wait_ready(page: Page, condition: str, target: str, timeout_ms: int,
+               quiet_ms: int = DEFAULT_QUIET_MS, expression: Optional[str] = None) -> Ready:
+    """Poll until ``condition`` holds or ``timeout_ms`` elapses.
+
+    Polling runs from this side of the connection rather than in a page
+    timer, so it is not slowed down when the tab is in the background.
+    ``expression`` overrides the probe for ``stable`` (any value that stops
+    changing, e.g. a collector's seen-count).
+    """
+    expr = expression or probe(condition, target)
+    start = time.perf_counter()
+    deadline = start + timeout_ms / 1000
+    last: Any = object()
+    since = start
+    while True:
+        now = time.perf_counter()
+        value = page.evaluate(expr)
+        if condition == "stable":
+            if value != last:
+                last, since = value, now
+            ok = bool(value) and (now - since) * 1000 >= quiet_ms
+        else:
+            ok = bool(value)
+        if ok or now >= deadline:
+            return Ready(condition, target, ok, round((now - start) * 1000, 1), timeout_ms, value)
+        time.sleep(POLL_INTERVAL)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    group = parser.add_mutually_exclusive_group(required=True)
+    for name in CONDITIONS:
+        group.add_argument(f"--{name}", metavar="EXPR" if name == "fn" else "SEL")
+    parser.add_argument("--timeout", type=int, default=5000, help="upper bound in ms (default 5000)")
+    parser.add_argument("--quiet", type=int, default=DEFAULT_QUIET_MS,
+                        help=f"ms the count must hold still for --stable (default {DEFAULT_QUIET_MS})")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on timeout")
+    parser.add_argument("--log", help="also append the result as a JSON line to this file")
+    parser.add_argument("--cdp", type=int, default=9222)
+    args = parser.parse_args(argv)
+
+    condition = next(name for name in CONDITIONS if getattr(args, name) is not None)
+    try:
+        conn = connect(args.cdp)
+        page = Page.attach(conn, active_target_id(args.cdp))
+        result = wait_ready(page, condition, getattr(args, condition), args.timeout, args.quiet)
+        conn.close()
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    line = json.dumps(asdict(result))
+    print(line)
+    if args.log:
+        with open(args.log, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    return 1 if args.strict and not result.ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""Queue-driven slot scheduler for Codex agents.
+
+Slots are git worktrees of one shared bare repository, so preparing a slot
+is a local checkout of ``origin/main`` rather than a fetch per clone, and
+all slots share a single object store. Slot and queue state live in
+``slots.json`` under the workspace root instead of being read back from
+terminal output.
+
+    python3 slots.py init --repo git@github.com:aj47/SpeakMCP.git --slots 5
+    python3 slots.py enqueue 123 pr:456 --note "fix hotkey crash"
+    python3 slots.py run                # dispatch until the queue drains
+    python3 slots.py status
+    python3 slots.py release slot-2     # after reviewing / opening the PR
+    python3 slots.py report             # queue wait and slot utilization
+
+Workspace root: --root, $CODEX_SLOTS_ROOT, or ~/Development/SpeakMCP-Workspaces.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import Iterator, Optional
+
+DEFAULT_ROOT = os.environ.get("CODEX_SLOTS_ROOT", os.path.expanduser("~/Development/SpeakMCP-Workspaces"))
+DEFAULT_CODEX = "codex exec --full-auto"
+STORE = ".store.git"
+STATE_FILE = "slots.json"
+
+PROMPTS = {
+    "issue": "Work on issue #{n}{note}. First read the issue by running `gh issue view {n}` "
+             "to get full context, then implement the fix.",
+    "pr": "Work on PR #{n}{note}. First read it with `gh pr view {n}` and `gh pr diff {n}` "
+          "to understand the existing changes, then address it.",
+}
+
+
+class SlotError(Exception):
+    """The workspace or a slot is not in a state the command can work with."""
+
+
+def git(*args: str, cwd: Optional[str] = None) -> str:
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SlotError(f"git {' '.join(args)}: {result.stderr.strip() or result.stdout.strip()}")
+    return result.stdout.strip()
+
+
+# -- state ------------------------------------------------------------
+
+def _empty_state() -> dict:
+    return {"slots": {}, "queue": [], "history": [], "fetched_at": 0}
+
+
+@contextlib.contextmanager
+def locked_state(root: str) -> Iterator[dict]:
+    """Load slots.json under an exclusive lock and write it back atomically on exit.
+
+    The state is written even when the block raises: whatever it changed
+    before failing (a started Codex process, a created worktree) happened.
+    """
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = _empty_state()
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as fh:
+                    state.update(json.load(fh))
+            try:
+                yield state
+            finally:
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    json.dump(state, fh, indent=2)
+                    fh.write("\n")
+                os.replace(tmp, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def parse_task(token: str) -> str:
+    """``123`` / ``#123`` / ``issue:123`` -> ``issue:123``; ``pr:45`` -> ``pr:45``."""
+    kind, _, number = token.lstrip("#").rpartition(":")
+    kind = kind or "issue"
+    if kind not in PROMPTS or not number.isdigit():
+        raise SlotError(f"bad task {token!r} — use 123, issue:123 or pr:123")
+    return f"{kind}:{number}"
+
+
+def assigned(state: dict) -> dict[str, str]:
+    """Task -> slot for every task a slot is running or holding for review."""
+    return {s["task"]: name for name, s in state["slots"].items() if s.get("task")}
+
+
+def prompt_for(task: str, note: str = "") -> str:
+    kind, number = task.split(":")
+    return PROMPTS[kind].format(n=number, note=f" - {note}" if note else "")
+
+
+# -- workspace --------------------------------------------------------
+
+def init(root: str, repo: str, slots: int, branch: str) -> None:
+    os.makedirs(root, exist_ok=True)
+    store = os.path.join(root, STORE)
+    if not os.path.exists(store):
+        git("clone", "--bare", repo, store)
+        # A bare clone maps branches straight onto refs/heads; track them as
+        # remote branches instead so worktrees can check out origin/<branch>.
+        git("config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*", cwd=store)
+        git("fetch", "--prune", "origin", cwd=store)
+    with locked_state(root) as state:
+        state["branch"] = branch
+        state["fetched_at"] = time.time()
+        for n in range(1, slots + 1):
+            name = f"slot-{n}"
+            path = os.path.join(root, name)
+            if name in state["slots"]:
+                continue
+            if os.path.exists(path):
+                raise SlotError(f"{path} already exists and is not a managed worktree — move it aside first")
+            git("worktree", "add", "--detach", path, f"origin/{branch}", cwd=store)
+            state["slots"][name] = {"state": "idle"}
+    print(f"{slots} slots ready in {root} (shared store {STORE})")
+
+
+def fetch(root: str, state: dict, max_age: float) -> None:
+    """One network fetch for every slot, at most every ``max_age`` seconds."""
+    if time.time() - state.get("fetched_at", 0) >= max_age:
+        git("fetch", "--prune", "origin", cwd=os.path.join(root, STORE))
+        state["fetched_at"] = time.time()
+
+
+def prepare(root: str, slot: str, task: str, branch: str) -> None:
+    """Reset a slot to a fresh local branch off origin/<branch> — no network."""
+    path = os.path.join(root, slot)
+    git("reset", "--hard", "--quiet", cwd=path)
+    git("clean", "-fdq", cwd=path)
+    git("checkout", "--quiet", "-B", "codex/" + task.replace(":", "-"), f"origin/{branch}", cwd=path)
+
+
+def detach(root: str, slot: str) -> None:
+    """Leave the slot's codex/<task> branch, so another slot can check it out later.
+
+    The files and the branch itself are kept.
+    """
+    try:
+        git("checkout", "--quiet", "--detach", cwd=os.path.join(root, slot))
+    except (SlotError, OSError):
+        pass
+
+
+def has_work(root: str, slot: str, branch: str) -> bool:
+    """Whether Codex left uncommitted changes or commits in the slot.
+
+    If git cannot tell, assume it did, so the slot is held for review
+    rather than reset.
+    """
+    path = os.path.join(root, slot)
+    try:
+        dirty = git("status", "--porcelain", cwd=path)
+        ahead = git("rev-list", "--count", f"origin/{branch}..HEAD", cwd=path)
+    except (SlotError, OSError):
+        return True
+    return bool(dirty) or ahead != "0"
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+# -- commands ---------------------------------------------------------
+
+def enqueue(root: str, tasks: list[str], note: str) -> None:
+    now = time.time()
+    with locked_state(root) as state:
+        queued = {item["task"] for item in state["queue"]}
+        taken = assigned(state)
+        added = []
+        for task in tasks:
+            if task in queued:
+                print(f"{task} already queued", file=sys.stderr)
+            elif task in taken:
+                # A second slot would check out the same codex/<task> branch
+                # and reset it under the first one.
+                name = taken[task]
+                print(f"{task} is already in {name} ({state['slots'][name]['state']}) — "
+                      f"release {name} before queueing it again", file=sys.stderr)
+            else:
+                state["queue"].append({"task": task, "note": note, "enqueued_at": now})
+                queued.add(task)
+                added.append(task)
+    if added:
+        print(f"queued {', '.join(added)}")
+
+
+def run(root: str, codex_cmd: str, fetch_interval: float, poll: float,
+        auto_release: bool, watch: bool) -> None:
+    """Hand queued tasks to free slots until the queue drains (or forever with ``watch``)."""
+    procs: dict[str, subprocess.Popen] = {}
+    logs = os.path.join(root, "logs")
+    os.makedirs(logs, exist_ok=True)
+
+    while True:
+        with locked_state(root) as state:
+            branch = state.get("branch", "main")
+            for name, proc in list(procs.items()):
+                code = proc.poll()
+                if code is not None:
+                    del procs[name]
+                    _finish(root, state, name, code, auto_release)
+            # Slots started by another dispatcher: reap them once their Codex exits
+            # (or if that dispatcher died mid-run), keeping whatever Codex left.
+            others = [n for n, s in state["slots"].items() if s["state"] == "busy" and n not in procs]
+            for name in others[:]:
+                if not _alive(state["slots"][name].get("pid")):
+                    others.remove(name)
+                    _finish(root, state, name, None, auto_release=False)
+            free = sorted((n for n, s in state["slots"].items() if s["state"] == "idle"),
+                          key=lambda n: int(n.split("-")[1]))
+            if free and state["queue"]:
+                try:
+                    fetch(root, state, fetch_interval)
+                except (SlotError, OSError) as exc:
+                    # Slots can still start from the refs already in the store.
+                    state["fetched_at"] = time.time()
+                    print(f"⚠ fetch failed, using the last fetched origin/{branch}: {exc}", file=sys.stderr)
+            while free and state["queue"]:
+                item = state["queue"].pop(0)
+                taken = assigned(state)
+                if item["task"] in taken:
+                    print(f"⚠ dropped {item['task']} — already in {taken[item['task']]}", file=sys.stderr)
+                    continue
+                name = free.pop(0)
+                try:
+                    procs[name] = _start(root, name, item, branch, codex_cmd, logs)
+                except (SlotError, OSError) as exc:
+                    # Take the slot out of rotation; `release` puts it back.
+                    detach(root, name)
+                    state["slots"][name] = {"state": "error", "task": None, "error": str(exc)}
+                    state["queue"].insert(0, item)
+                    print(f"⚠ {name}: could not start {item['task']}: {exc}", file=sys.stderr)
+                    continue
+                state["slots"][name] = {
+                    "state": "busy", "task": item["task"], "pid": procs[name].pid,
+                    "enqueued_at": item["enqueued_at"], "started_at": time.time(),
+                    "log": os.path.join(logs, item["task"].replace(":", "-") + ".log"),
+                }
+                print(f"{name}: started {item['task']} (waited {time.time() - item['enqueued_at']:.1f}s)")
+            done = not procs and not others and not state["queue"]
+            stuck = not procs and not others and state["queue"] and not any(
+                s["state"] in ("idle", "review") for s in state["slots"].values())
+        if done and not watch:
+            return
+        if stuck:
+            raise SlotError("every slot failed to start a task — see `status`, fix and `release` them")
+        time.sleep(poll)
+
+
+def _start(root: str, name: str, item: dict, branch: str, codex_cmd: str, logs: str) -> subprocess.Popen:
+    prepare(root, name, item["task"], branch)
+    with open(os.path.join(logs, item["task"].replace(":", "-") + ".log"), "ab") as log:
+        return subprocess.Popen(
+            shlex.split(codex_cmd) + [prompt_for(item["task"], item.get("note", ""))],
+            cwd=os.path.join(root, name), stdout=log, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL)
+
+
+def _finish(root: str, state: dict, name: str, code: Optional[int], auto_release: bool) -> None:
+    slot = state["slots"][name]
+    branch = state.get("branch", "main")
+    state["history"].append({
+        "task": slot.get("task"), "slot": name, "exit_code": code,
+        "enqueued_at": slot.get("enqueued_at"), "started_at": slot.get("started_at"),
+        "finished_at": time.time(),
+    })
+    keep = not auto_release and has_work(root, name, branch)
+    if not keep:
+        detach(root, name)
+    state["slots"][name] = {"state": "review", "task": slot.get("task"), "log": slot.get("log")} \
+        if keep else {"state": "idle"}
+    outcome = "left changes for review" if keep else "finished with no changes" if not auto_release else "released"
+    print(f"{name}: {slot.get('task')} exited {code} — {outcome}")
+
+
+def release(root: str, names: list[str]) -> None:
+    with locked_state(root) as state:
+        for name in names:
+            slot = state["slots"].get(name)
+            if slot is None:
+                raise SlotError(f"no slot {name!r}")
+            if slot["state"] == "busy":
+                raise SlotError(f"{name} is still running {slot.get('task')}")
+            detach(root, name)
+            state["slots"][name] = {"state": "idle"}
+    print(f"released {', '.join(names)} — the next task resets them")
+
+
+def metrics(state: dict, now: Optional[float] = None) -> dict:
+    """Queue wait and per-slot utilization over the span covered by the history.
+
+    The span runs from the first enqueue to the last finish, or to now while
+    a slot is still busy, so a finished run reports the same whenever asked.
+    """
+    now = now or time.time()
+    runs = [h for h in state["history"] if h.get("started_at") and h.get("enqueued_at")]
+    waits = [h["started_at"] - h["enqueued_at"] for h in runs]
+    busy_now = [s for s in state["slots"].values() if s["state"] == "busy"]
+    starts = [h["enqueued_at"] for h in runs] + [s["enqueued_at"] for s in busy_now]
+    end = now if busy_now else max((h["finished_at"] for h in runs), default=now)
+    window = (end - min(starts)) if starts else 0.0
+    per_slot = {}
+    for name, slot in state["slots"].items():
+        busy = sum(h["finished_at"] - h["started_at"] for h in runs if h["slot"] == name)
+        if slot["state"] == "busy":
+            busy += now - slot["started_at"]
+        per_slot[name] = round(busy / window, 3) if window else 0.0
+    return {
+        "tasks_finished": len(runs),
+        "queued": len(state["queue"]),
+        "queue_wait_s": {
+            "mean": round(statistics.mean(waits), 1) if waits else 0.0,
+            "p50": round(statistics.median(waits), 1) if waits else 0.0,
+            "max": round(max(waits), 1) if waits else 0.0,
+        },
+        "utilization": {
+            "overall": round(sum(per_slot.values()) / len(per_slot), 3) if per_slot else 0.0,
+            "per_slot": per_slot,
+        },
+        "window_s": round(window, 1),
+    }
+
+
+def status(root: str) -> None:
+    with locked_state(root) as state:
+        now = time.time()
+        for name in sorted(state["slots"], key=lambda n: int(n.split("-")[1])):
+            slot = state["slots"][name]
+            detail = ""
+            if slot["state"] == "busy":
+                detail = f"{slot['task']}  running {now - slot['started_at']:.0f}s  log {slot['log']}"
+            elif slot["state"] == "review":
+                detail = f"{slot['task']}  changes waiting — review, open PR, then `release {name}`"
+            elif slot["state"] == "error":
+                detail = f"{slot['error']}  — fix, then `release {name}`"
+            print(f"{name:<8} {slot['state']:<7} {detail}")
+        for item in state["queue"]:
+            print(f"queued   {item['task']:<12} waiting {now - item['enqueued_at']:.0f}s")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", default=DEFAULT_ROOT, help=f"workspace root (default {DEFAULT_ROOT})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init", help="create the shared store and slot worktrees")
+    p.add_argument("--repo", required=True, help="clone URL or path (a local bare repo works for testing)")
+    p.add_argument("--slots", type=int, default=5)
+    p.add_argument("--branch", default="main")
+
+    p = sub.add_parser("enqueue", help="queue issues (123) or PRs (pr:123)")
+    p.add_argument("tasks", nargs="+")
+    p.add_argument("--note", default="", help="one-line summary passed to Codex")
+
+    p = sub.add_parser("run", help="dispatch queued tasks to free slots")
+    p.add_argument("--codex-cmd", default=DEFAULT_CODEX,
+                   help=f"command to run in the slot; the prompt is appended (default {DEFAULT_CODEX!r})")
+    p.add_argument("--fetch-interval", type=float, default=300,
+                   help="seconds before the shared store is fetched again (default 300)")
+    p.add_argument("--poll", type=float, default=2.0, help="seconds between checks (default 2)")
+    p.add_argument("--auto-release", action="store_true",
+                   help="free slots as soon as Codex exits instead of holding them for review")
+    p.add_argument("--watch", action="store_true", help="keep running after the queue drains")
+
+    sub.add_parser("status", help="slots and queue")
+    p = sub.add_parser("release", help="mark reviewed slots free")
+    p.add_argument("slots", nargs="+")
+    p = sub.add_parser("report", help="queue wait time and slot utilization")
+    p.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "init":
+            init(args.root, args.repo, args.slots, args.branch)
+            return 0
+        if not os.path.exists(os.path.join(args.root, STORE)):
+            raise SlotError(f"{args.root} has no slot store — run `slots.py init --repo ...` first")
+        if args.command == "enqueue":
+            enqueue(args.root, [parse_task(t) for t in args.tasks], args.note)
+        elif args.command == "run":
+            run(args.root, args.codex_cmd, args.fetch_interval, args.poll, args.auto_release, args.watch)
+        elif args.command == "status":
+            status(args.root)
+        elif args.command == "release":
+            release(args.root, args.slots)
+        else:
+            with locked_state(args.root) as state:
+                report = metrics(state)
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                wait, util = report["queue_wait_s"], report["utilization"]
+                print(f"{report['tasks_finished']} tasks finished, {report['queued']} queued, "
+                      f"over {report['window_s']:.0f}s")
+                print(f"queue wait   mean {wait['mean']}s  p50 {wait['p50']}s  max {wait['max']}s")
+                print(f"utilization  {util['overall']:.0%} overall  " + "  ".join(
+                    f"{n} {u:.0%}" for n, u in sorted(util["per_slot"].items(),
+                                                      key=lambda kv: int(kv[0].split("-")[1]))))
+    except SlotError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""slots.py against a local bare repo, with a stub in place of ``codex``.
+
+    python3 -m unittest discover codex-issue-runner/scripts
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import slots  # noqa: E402
+
+ECHO = "sh -c 'echo \"$0\"'"                    # prints the prompt, changes nothing
+EDIT = "sh -c 'echo \"$0\" > codex-output.txt'"  # leaves a file for review
+
+
+class SlotsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = self.tmp.name
+        env = {**os.environ, "GIT_AUTHOR_NAME": "t", "GIT_AUTHOR_EMAIL": "t@example.com",
+               "GIT_COMMITTER_NAME": "t", "GIT_COMMITTER_EMAIL": "t@example.com"}
+        src = os.path.join(base, "src")
+        subprocess.run(["git", "init", "-q", "-b", "main", src], check=True)
+        subprocess.run(["git", "commit", "-q", "--allow-empty", "-m", "init"], cwd=src, env=env, check=True)
+        self.remote = os.path.join(base, "remote.git")
+        subprocess.run(["git", "clone", "-q", "--bare", src, self.remote], check=True)
+        self.root = os.path.join(base, "ws")
+        self.slots("init", "--repo", self.remote, "--slots", "2")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def slots(self, *argv: str) -> int:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return slots.main(["--root", self.root, *argv])
+
+    def run_queue(self, codex_cmd: str) -> int:
+        return self.slots("run", "--codex-cmd", codex_cmd, "--poll", "0.05")
+
+    def state(self) -> dict:
+        with open(os.path.join(self.root, slots.STATE_FILE), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def test_run_drains_queue_and_reports(self):
+        self.slots("enqueue", "1", "2", "pr:3")
+        self.assertEqual(self.run_queue(ECHO), 0)
+        state = self.state()
+        self.assertEqual(sorted(h["task"] for h in state["history"]), ["issue:1", "issue:2", "pr:3"])
+        self.assertEqual({s["state"] for s in state["slots"].values()}, {"idle"})
+        with open(os.path.join(self.root, "logs", "pr-3.log"), encoding="utf-8") as fh:
+            self.assertIn("gh pr view 3", fh.read())
+        report = slots.metrics(state)
+        self.assertEqual(report["tasks_finished"], 3)
+        self.assertGreater(report["utilization"]["overall"], 0)
+
+    def test_task_held_for_review_is_not_queued_again(self):
+        self.slots("enqueue", "7")
+        self.run_queue(EDIT)
+        self.assertEqual(self.state()["slots"]["slot-1"]["state"], "review")
+
+        self.slots("enqueue", "7")
+        self.assertEqual(self.state()["queue"], [])
+
+        # An entry queued before the task was assigned is dropped at dispatch.
+        with slots.locked_state(self.root) as state:
+            state["queue"].append({"task": "issue:7", "note": "", "enqueued_at": 0})
+        self.run_queue(EDIT)
+        state = self.state()
+        self.assertEqual(state["slots"]["slot-2"]["state"], "idle")
+        self.assertEqual(len(state["history"]), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "slot-1", "codex-output.txt")))
+
+    def test_released_task_can_run_in_another_slot(self):
+        self.slots("enqueue", "7")
+        self.run_queue(EDIT)
+        self.slots("release", "slot-1")
+        with slots.locked_state(self.root) as state:
+            state["slots"]["slot-1"]["state"] = "review"  # keep slot-1 out of the way
+        self.slots("enqueue", "7")
+        self.assertEqual(self.run_queue(ECHO), 0)
+        self.assertEqual(self.state()["history"][-1]["slot"], "slot-2")
+
+    def test_start_failure_is_recorded(self):
+        self.slots("enqueue", "5")
+        self.assertEqual(self.run_queue("/nonexistent/codex"), 1)
+        state = self.state()
+        self.assertEqual({s["state"] for s in state["slots"].values()}, {"error"})
+        self.assertEqual([item["task"] for item in state["queue"]], ["issue:5"])
+
+        self.slots("release", "slot-1", "slot-2")
+        self.assertEqual(self.run_queue(ECHO), 0)
+        self.assertEqual([h["task"] for h in self.state()["history"]], ["issue:5"])
+
+    def test_slot_from_another_dispatcher_is_reaped(self):
+        other = subprocess.Popen(["sleep", "0.3"])
+        threading.Thread(target=other.wait, daemon=True).start()  # reap it, as its dispatcher would
+        now = time.time()
+        with slots.locked_state(self.root) as state:
+            state["slots"]["slot-1"] = {"state": "busy", "task": "issue:9", "pid": other.pid,
+                                        "enqueued_at": now, "started_at": now, "log": ""}
+        self.assertEqual(self.run_queue(ECHO), 0)
+        self.assertIsNotNone(other.poll())
+        state = self.state()
+        self.assertEqual(state["slots"]["slot-1"]["state"], "idle")
+        self.assertEqual([h["task"] for h in state["history"]], ["issue:9"])
+
+    def test_utilization_window_ends_at_last_finish(self):
+        state = {"queue": [], "slots": {"slot-1": {"state": "idle"}, "slot-2": {"state": "idle"}},
+                 "history": [{"task": "issue:1", "slot": "slot-1", "enqueued_at": 100.0,
+                              "started_at": 100.0, "finished_at": 110.0}]}
+        for now in (110.0, 10_000.0):
+            report = slots.metrics(state, now)
+            self.assertEqual(report["window_s"], 10.0)
+            self.assertEqual(report["utilization"]["per_slot"], {"slot-1": 1.0, "slot-2": 0.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
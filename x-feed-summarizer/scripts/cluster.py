@@ -0,0 +1,379 @@
+"""Collapse and group scraped X posts before summarizing them.
+
+Runs offline between extraction and the summary. Three passes:
+
+1. Links are canonicalized (tracking parameters, ``www.``, twitter.com vs
+   x.com, /photo/N suffixes) and posts are de-duplicated by status ID.
+2. Near-duplicate posts — retweets of the same link, copies of the same
+   announcement, quotes of the same post — are collapsed with MinHash over
+   word shingles (LSH banding finds candidates) plus shared links.
+3. What remains is grouped into themes by cosine similarity of TF-IDF
+   vectors.
+
+The output is one compact block per cluster — representative post, member
+links, counts — so the model reads a few lines per theme instead of every
+post. Clusters with several posts map onto "Main Themes"; representatives
+map onto "Key Highlights".
+
+    python3 cluster.py < posts.json                  # Step 3 eval output
+    python3 store.py recent --since 24h | python3 cluster.py --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+NUM_PERM = 64
+BANDS = 32  # 2 rows per band: pairs above ~0.3 Jaccard almost always become candidates
+LINK_SIMILARITY = 0.2  # shingle Jaccard two posts sharing a link need to merge...
+LINK_ONLY_WORDS = 5    # ...unless one of them is little more than the link
+MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240601)
+PERMS = [(_rng.randrange(1, MERSENNE), _rng.randrange(0, MERSENNE)) for _ in range(NUM_PERM)]
+
+TRACKING = re.compile(r"^(utm_\w+|s|t|ref|ref_src|ref_url|src|fbclid|gclid|igshid|si|mc_\w+|cn)$")
+STATUS = re.compile(r"^/(\w+)/status/(\d+)")
+URL = re.compile(r"https?://\S+|\b[\w-]+(?:\.[\w-]+)+/\S*")
+WORD = re.compile(r"[#@]?\w[\w'-]*")
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been before being but by can could did do does
+doing don't down during each few for from further had has have having he her here hers him his how i i'm if in
+into is it it's its just me more most my no nor not now of off on once only or other our ours out over own same
+she should so some such than that that's the their theirs them then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your yours
+rt via new today just like get got one now it's im dont can't cant really much many way make made
+""".split())
+
+
+def _split(url: str):
+    """``urlsplit``, or None for a link it rejects (e.g. a stray ``[`` in the host)."""
+    try:
+        return urlsplit(url)
+    except ValueError:
+        return None
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a link so the same page shared different ways compares equal; "" if malformed."""
+    url = url.strip().rstrip("…").rstrip(".,)")
+    if not re.match(r"^\w+://", url):
+        url = "https://" + url
+    parts = _split(url)
+    if parts is None:
+        return ""
+    host = parts.netloc.lower().removeprefix("www.").removeprefix("mobile.")
+    if host in ("twitter.com", "x.com"):
+        host = "x.com"
+        match = STATUS.match(parts.path)
+        if match:  # drop /photo/1, /analytics, etc. and the query
+            return f"https://x.com/{match.group(1).lower()}/status/{match.group(2)}"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING.match(k)))
+    path = parts.path.rstrip("/") or ""
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _status(url: str) -> Optional[re.Match]:
+    parts = _split(url) if url else None
+    return STATUS.match(parts.path) if parts else None
+
+
+def status_id(url: str) -> Optional[str]:
+    match = _status(url)
+    return match.group(2) if match else None
+
+
+def _link_targets(record: dict) -> list[str]:
+    """Canonical external and quoted-post links, ignoring profile/hashtag/search links."""
+    out = []
+    for link in record.get("links") or []:
+        href, text = (link.get("href", ""), link.get("text", "")) if isinstance(link, dict) else (link, "")
+        if not href:
+            continue
+        # t.co can't be resolved offline; its display text is the real URL.
+        if getattr(_split(href), "netloc", "") == "t.co" and re.match(r"^[\w-]+(\.[\w-]+)+(/\S*)?$", text.rstrip("…")):
+            href = text
+        url = canonical_url(href)
+        if not url or urlsplit(url).netloc == "x.com" and not status_id(url):
+            continue
+        if url not in out:
+            out.append(url)
+    return out
+
+
+@dataclass
+class Post:
+    index: int
+    record: dict
+    id: str
+    handle: str
+    text: str
+    links: list[str]
+    shingles: set = field(default_factory=set)
+    signature: tuple = ()
+
+    @property
+    def link(self) -> str:
+        return canonical_url(self.record["link"]) if self.record.get("link") else ""
+
+
+def load(records: Iterable[dict]) -> tuple[list[Post], int]:
+    """Posts de-duplicated by status ID (or identical text when there is no link)."""
+    posts, seen = [], set()
+    total = 0
+    for record in records:
+        total += 1
+        link = record.get("link") or ""
+        key = str(record.get("id") or status_id(link) or "") or "text:" + (record.get("text") or "")
+        if key in seen or not (record.get("text") or "").strip():
+            continue
+        seen.add(key)
+        handle = (record.get("handle") or "").lstrip("@")
+        if not handle and link:
+            match = _status(link)
+            handle = match.group(1) if match else ""
+        posts.append(Post(len(posts), record, key, handle, record["text"], _link_targets(record)))
+    return posts, total
+
+
+def words(text: str) -> list[str]:
+    return [w.lower() for w in WORD.findall(URL.sub(" ", text))]
+
+
+def minhash(shingles: set) -> tuple:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    if not hashes:
+        return tuple([MERSENNE] * NUM_PERM)
+    return tuple(min((a * h + b) % MERSENNE for h in hashes) for a, b in PERMS)
+
+
+def _similarity(a: tuple, b: tuple) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        self.parent[self.find(i)] = self.find(j)
+
+
+def near_duplicates(posts: list[Post], threshold: float) -> list[list[Post]]:
+    """Groups of posts that are near-identical text, share a link, or quote one another.
+
+    A shared link only merges posts whose text is also somewhat alike;
+    posts that are little more than the link join the first post that says
+    something about it. Otherwise a popular URL would pull unrelated
+    commentary into one group.
+    """
+    uf = _UnionFind(len(posts))
+    buckets: dict[tuple, list[int]] = defaultdict(list)
+    rows = NUM_PERM // BANDS
+    sizes = []
+    for post in posts:
+        tokens = words(post.text)
+        sizes.append(len(tokens))
+        post.shingles = {" ".join(tokens[i:i + 3]) for i in range(max(1, len(tokens) - 2))}
+        post.signature = minhash(post.shingles)
+        for band in range(BANDS):
+            buckets[(band, post.signature[band * rows:(band + 1) * rows])].append(post.index)
+    checked = set()
+    for members in buckets.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                if (a, b) not in checked:
+                    checked.add((a, b))
+                    if _similarity(posts[a].signature, posts[b].signature) >= threshold:
+                        uf.union(a, b)
+    by_link: dict[str, list[int]] = defaultdict(list)
+    own = {p.link: p.index for p in posts if p.link}
+    for post in posts:
+        for url in post.links:
+            if url in own:  # quotes a post that is itself in the feed
+                uf.union(post.index, own[url])
+            by_link[url].append(post.index)
+    for holders in by_link.values():
+        said = [i for i in holders if sizes[i] > LINK_ONLY_WORDS]
+        for n, a in enumerate(said):
+            for b in said[n + 1:]:
+                if _similarity(posts[a].signature, posts[b].signature) >= LINK_SIMILARITY:
+                    uf.union(a, b)
+        # Bare shares join one post about the link, so they can't bridge two topics.
+        anchor = said[0] if said else holders[0]
+        for i in holders:
+            if sizes[i] <= LINK_ONLY_WORDS:
+                uf.union(i, anchor)
+    groups: dict[int, list[Post]] = defaultdict(list)
+    for post in posts:
+        groups[uf.find(post.index)].append(post)
+    return list(groups.values())
+
+
+def _terms(group: list[Post]) -> Counter:
+    counts: Counter = Counter()
+    for post in group:
+        counts.update(w for w in words(post.text)
+                      if len(w) > 2 and w not in STOPWORDS and not w.isdigit() and not w.startswith("@"))
+        counts.update("site:" + urlsplit(url).netloc for url in post.links if not status_id(url))
+    return counts
+
+
+def _normalize(vector: dict) -> dict:
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {k: v / norm for k, v in vector.items()}
+
+
+def themes(groups: list[list[Post]], threshold: float) -> list[tuple[list[list[Post]], dict]]:
+    """Greedy centroid clustering of duplicate groups on TF-IDF cosine similarity."""
+    counts = [_terms(g) for g in groups]
+    df = Counter(t for c in counts for t in c)
+    n = len(groups)
+    vectors = [_normalize({t: (1 + math.log(tf)) * math.log((1 + n) / (1 + df[t])) for t, tf in c.items()})
+               for c in counts]
+    order = sorted(range(n), key=lambda i: -len(groups[i]))
+    clusters: list[tuple[list[int], dict]] = []
+    postings: dict[str, set[int]] = defaultdict(set)  # term -> clusters whose centroid has it
+    for i in order:
+        # Only centroids sharing a term can score above zero.
+        scores: dict[int, float] = defaultdict(float)
+        for t, v in vectors[i].items():
+            for c in postings[t]:
+                scores[c] += v * clusters[c][1][t]
+        best = max(scores, key=scores.get, default=None)
+        if best is None or scores[best] < threshold:
+            best = len(clusters)
+            clusters.append(([], {}))
+        members, centroid = clusters[best]
+        members.append(i)
+        for t, v in vectors[i].items():
+            centroid[t] = centroid.get(t, 0.0) + v
+            postings[t].add(best)
+        clusters[best] = (members, _normalize(centroid))
+    return [([groups[i] for i in members], centroid) for members, centroid in clusters]
+
+
+def _closeness(post: Post, centroid: dict) -> float:
+    """Cosine between a post's own terms and its theme's centroid."""
+    vector = _normalize({t: 1 + math.log(tf) for t, tf in _terms([post]).items()})
+    return sum(v * centroid.get(t, 0.0) for t, v in vector.items())
+
+
+def _label(groups: list[list[Post]], centroid: dict, size: int = 4) -> str:
+    # Only terms shared by more than one group say what the theme is about.
+    spread = Counter(t for g in groups for t in set(_terms(g)))
+    shared = [t for t in sorted(centroid, key=centroid.get, reverse=True) if spread[t] > 1 or len(groups) == 1]
+    return " · ".join(t.removeprefix("site:") for t in shared[:size])
+
+
+def summarize(posts: list[Post], total: int, dup_threshold: float = 0.5,
+              theme_threshold: float = 0.2, max_members: int = 5) -> dict:
+    groups = near_duplicates(posts, dup_threshold)
+    clusters = []
+    for members, centroid in themes(groups, theme_threshold):
+        flat = [p for g in members for p in g]
+        # Representative: the post closest to what the label describes.
+        rep = max(flat, key=lambda p: (round(_closeness(p, centroid), 6), not p.record.get("context"), len(p.text)))
+        link_counts = Counter(url for p in flat for url in p.links)
+        clusters.append({
+            "theme": _label(members, centroid) if len(flat) > 1 else "",
+            "posts": len(flat),
+            "duplicates": len(flat) - len(members),
+            "accounts": sorted({"@" + p.handle for p in flat if p.handle}),
+            "representative": {k: rep.record.get(k, "") for k in ("user", "time")}
+            | {"handle": rep.handle, "link": rep.link, "text": rep.text},
+            "links": [{"url": u, "count": c} for u, c in link_counts.most_common()],
+            "members": [p.link for p in flat if p is not rep and p.link][:max_members],
+            "more": max(0, len(flat) - 1 - max_members),
+        })
+    clusters.sort(key=lambda c: (-c["posts"], -len(c["accounts"])))
+    return {
+        "posts": total,
+        "unique": len(posts),
+        "collapsed": len(posts) - len(groups),
+        "clusters": clusters,
+    }
+
+
+def _clip(text: str, chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= chars else text[:chars - 1].rstrip() + "…"
+
+
+def render(result: dict, chars: int = 240) -> str:
+    """Compact text for the model: one block per theme, one line per lone post."""
+    lines = [f"# {result['posts']} posts -> {result['unique']} unique -> {len(result['clusters'])} clusters "
+             f"({result['collapsed']} near-duplicates collapsed)"]
+    themed = [c for c in result["clusters"] if c["posts"] > 1]
+    single = [c for c in result["clusters"] if c["posts"] == 1]
+    for n, c in enumerate(themed, 1):
+        rep = c["representative"]
+        lines.append(f"\n## {n}. {c['theme'] or '(untitled)'} — {c['posts']} posts, {len(c['accounts'])} accounts"
+                     + (f", {c['duplicates']} duplicates" if c["duplicates"] else ""))
+        lines.append(f"rep: @{rep['handle']} {rep['link']}: {_clip(rep['text'], chars)}")
+        if c["links"]:
+            lines.append("links: " + ", ".join(l["url"] + (f" (x{l['count']})" if l["count"] > 1 else "")
+                                               for l in c["links"][:5]))
+        if c["members"]:
+            lines.append("also: " + ", ".join(c["members"]) + (f" (+{c['more']} more)" if c["more"] else ""))
+        lines.append("accounts: " + " ".join(c["accounts"][:10])
+                     + (f" (+{len(c['accounts']) - 10})" if len(c["accounts"]) > 10 else ""))
+    if single:
+        lines.append("\n## Other posts")
+        for c in single:
+            rep = c["representative"]
+            extra = f" [{c['links'][0]['url']}]" if c["links"] else ""
+            lines.append(f"- @{rep['handle']} {rep['link']}: {_clip(rep['text'], chars)}{extra}")
+    return "\n".join(lines) + "\n"
+
+
+def read_records(stream) -> Iterable[dict]:
+    """Records from JSONL (collect.py, store.py recent) or a JSON array (the Step 3 eval)."""
+    text = stream.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", nargs="?", help="JSON array or JSONL file (default stdin)")
+    parser.add_argument("--json", action="store_true", help="print the cluster list as JSON")
+    parser.add_argument("--dup-threshold", type=float, default=0.5,
+                        help="estimated shingle Jaccard for near-duplicates (default 0.5)")
+    parser.add_argument("--theme-threshold", type=float, default=0.2,
+                        help="TF-IDF cosine to join a theme (default 0.2; higher = more, tighter themes)")
+    parser.add_argument("--members", type=int, default=5, help="member links listed per cluster (default 5)")
+    parser.add_argument("--chars", type=int, default=240, help="representative text length (default 240)")
+    args = parser.parse_args(argv)
+
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    with source:
+        raw = list(read_records(source))
+    posts, total = load(raw)
+    result = summarize(posts, total, args.dup_threshold, args.theme_threshold, args.members)
+    out = json.dumps(result, ensure_ascii=False, indent=2) + "\n" if args.json else render(result, args.chars)
+    sys.stdout.write(out)
+    chars_in = sum(len(json.dumps(r, ensure_ascii=False)) for r in raw)
+    print(f"{total} posts, ~{chars_in // 4} tokens in -> {len(result['clusters'])} clusters, "
+          f"~{len(out) // 4} tokens out", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
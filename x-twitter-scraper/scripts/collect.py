@@ -0,0 +1,166 @@
+"""Stream de-duplicated tweets from the active X tab as JSONL.
+
+Injects collector.js once, then alternates scroll and drain over a single
+CDP connection. Each drain returns only tweets mounted since the previous
+one, so a long scrape never re-reads posts it already has.
+
+    python3 collect.py --url https://x.com/home --limit 200 > feed.jsonl
+    python3 collect.py --url https://x.com/username --rounds 10 -o profile.jsonl
+    python3 collect.py --url https://x.com/username --db   # incremental, see store.py
+
+Requires the chrome-browser skill (Chrome on port 9222 and its scripts/
+folder installed next to this skill).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from typing import Iterator, Optional, TextIO
+from urllib.parse import urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "chrome-browser", "scripts"))
+from cdp import CDPError, Page, active_target_id, connect  # noqa: E402
+from ready import wait_ready  # noqa: E402
+import store  # noqa: E402
+
+COLLECTOR_JS = os.path.join(HERE, "collector.js")
+
+
+def inject(page: Page) -> dict:
+    """Start the in-page collector (idempotent) and return its stats."""
+    with open(COLLECTOR_JS, encoding="utf-8") as fh:
+        return json.loads(page.evaluate(fh.read()))
+
+
+def collect(page: Page, limit: Optional[int] = None, rounds: int = 50,
+            idle_rounds: int = 3, scroll_px: int = 2000, scroll_wait_ms: int = 1500,
+            quiet_ms: int = 500) -> Iterator[dict]:
+    """Yield tweet records as they mount, scrolling until a stop condition is hit.
+
+    After each scroll, waits until the collector's seen-count has held
+    still for ``quiet_ms`` (at most ``scroll_wait_ms``). Stops after
+    ``limit`` records, ``rounds`` scrolls, or ``idle_rounds`` consecutive
+    scrolls that produced nothing new.
+    """
+    inject(page)
+    emitted = idle = dropped = 0
+    for _ in range(rounds + 1):
+        batch = json.loads(page.evaluate("window.__xCollector.drain()"))
+        if batch["dropped"] > dropped:  # a running total: warn only about new drops
+            print(f"warning: collector buffer overflowed, {batch['dropped'] - dropped} posts dropped — "
+                  "lower --scroll-px", file=sys.stderr)
+            dropped = batch["dropped"]
+        for record in batch["records"]:
+            yield record
+            emitted += 1
+            if limit and emitted >= limit:
+                return
+        idle = 0 if batch["records"] else idle + 1
+        if idle >= idle_rounds:
+            return
+        page.evaluate(f"window.scrollBy(0, {scroll_px})")
+        wait_ready(page, "stable", "collector", scroll_wait_ms, quiet_ms,
+                   expression="window.__xCollector.stats().seen")
+
+
+def until_known(records: Iterator[dict], db, feed: str, overlap: int = 2) -> Iterator[dict]:
+    """Store records as they stream in and stop once the scrape reaches posts ``feed`` already has.
+
+    Stops at the newest stored post, or after ``overlap`` consecutive
+    already-stored posts (a retweet of an old post alone does not stop it).
+    Pinned posts are stored but never count toward stopping.
+    """
+    newest = store.newest_id(db, feed)
+    known_run = 0
+    for record in records:
+        tweet_id = store.status_id(record)
+        pinned = "pinned" in record.get("context", "").lower()
+        known = tweet_id is not None and store.is_known(db, feed, tweet_id)
+        store.upsert(db, [record], feed)
+        if known and not pinned:
+            known_run += 1
+            if tweet_id == newest or known_run >= overlap:
+                return
+            continue
+        known_run = 0
+        if not known:
+            yield record
+
+
+def write_jsonl(records: Iterator[dict], out: TextIO) -> int:
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        count += 1
+    return count
+
+
+def profile_feed(url: Optional[str]) -> Optional[str]:
+    """``@handle`` for a profile URL such as https://x.com/handle."""
+    if not url:
+        return None
+    path = urlparse(url).path.strip("/")
+    if path and "/" not in path and path not in ("home", "explore", "notifications", "messages", "search"):
+        return "@" + path
+    return None
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="navigate here first (default: scrape the active tab as-is)")
+    parser.add_argument("--limit", type=int, help="stop after this many posts")
+    parser.add_argument("--rounds", type=int, default=50, help="maximum scrolls (default 50)")
+    parser.add_argument("--idle-rounds", type=int, default=3,
+                        help="stop after this many scrolls with no new posts (default 3)")
+    parser.add_argument("--scroll-px", type=int, default=2000)
+    parser.add_argument("--scroll-wait", type=int, default=1500,
+                        help="upper bound in ms to wait for new posts after each scroll")
+    parser.add_argument("--quiet", type=int, default=500,
+                        help="treat the page as settled once no post has mounted for this many ms")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default stdout)")
+    parser.add_argument("--db", nargs="?", const=store.DEFAULT_DB,
+                        help="store posts here and stop at ones already stored (default path if no value)")
+    parser.add_argument("--feed", help="feed name for --db: following, foryou, @handle "
+                                       "(default: @handle for profile URLs)")
+    parser.add_argument("--overlap", type=int, default=2,
+                        help="with --db, stop after this many consecutive already-stored posts")
+    parser.add_argument("--cdp", type=int, default=9222)
+    args = parser.parse_args(argv)
+    feed = args.feed or profile_feed(args.url)
+    if args.db and not feed:
+        parser.error("--db needs --feed (following, foryou, ...) unless --url is a profile")
+
+    try:
+        conn = connect(args.cdp)
+        page = Page.attach(conn, active_target_id(args.cdp))
+        if args.url:
+            page.navigate(args.url)
+            wait_ready(page, "stable", 'article[data-testid="tweet"]', 8000)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        db = store.open_store(args.db) if args.db else None
+        try:
+            records = collect(page, args.limit, args.rounds, args.idle_rounds,
+                              args.scroll_px, args.scroll_wait, args.quiet)
+            if db:
+                records = until_known(records, db, feed, args.overlap)
+            count = write_jsonl(records, out)
+        finally:
+            if args.output:
+                out.close()
+            if db:
+                db.close()
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    print(f"collected {count} {'new ' if args.db else ''}posts", file=sys.stderr)
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
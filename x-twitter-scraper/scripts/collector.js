@@ -0,0 +1,100 @@
+// Streaming tweet collector for X timelines.
+//
+// Inject once per page. A MutationObserver records each tweet as it mounts,
+// de-duplicated by the status ID in its timestamp link, into a bounded
+// buffer. Call window.__xCollector.drain() after each scroll to take only
+// the records added since the last drain, so a long scrape costs
+// O(new posts) per round instead of re-serializing the whole visible DOM.
+//
+// Re-injecting is a no-op that reports the running collector's stats.
+(() => {
+  if (window.__xCollector) {
+    return JSON.stringify({ status: 'already-running', ...window.__xCollector.stats() });
+  }
+
+  const MAX_BUFFER = 500;
+  const TWEET = 'article[data-testid="tweet"]';
+  const seen = new Set();
+  const buffer = [];
+  let seq = 0;
+  let dropped = 0;
+
+  const statusId = (href) => {
+    const m = /\/status\/(\d+)/.exec(href || '');
+    return m ? m[1] : null;
+  };
+
+  const extract = (a) => {
+    const timeEl = a.querySelector('time');
+    const linkEl = timeEl ? timeEl.closest('a') : null;
+    const id = linkEl ? statusId(linkEl.getAttribute('href')) : null;
+    if (!id || seen.has(id)) return null;
+    const textEl = a.querySelector('[data-testid="tweetText"]');
+    // Text can render a frame after the article mounts; a later
+    // mutation inside the article brings us back here.
+    if (!textEl || !textEl.innerText) return null;
+    const userEl = a.querySelector('[data-testid="User-Name"]');
+    const handleEl = userEl ? userEl.querySelector('a[href^="/"]:not([href*="/status/"])') : null;
+    const contextEl = a.querySelector('[data-testid="socialContext"]');
+    const links = Array.from(a.querySelectorAll('[data-testid="tweetText"] a[href], [data-testid="card.wrapper"] a[href]'))
+      .map(l => ({ text: l.innerText.trim().slice(0, 80), href: l.href }))
+      .filter(l => l.href && !statusId(l.href));
+    return {
+      id,
+      seq: seq++,
+      user: userEl ? userEl.innerText.replace(/\n/g, ' ') : 'Unknown',
+      handle: handleEl ? handleEl.getAttribute('href').slice(1) : '',
+      text: textEl.innerText,
+      time: timeEl.getAttribute('datetime') || '',
+      link: 'https://x.com' + linkEl.getAttribute('href'),
+      context: contextEl ? contextEl.innerText : '',
+      links
+    };
+  };
+
+  const take = (article) => {
+    const record = extract(article);
+    if (!record) return;
+    seen.add(record.id);
+    buffer.push(record);
+    if (buffer.length > MAX_BUFFER) {
+      buffer.shift();
+      dropped++;
+    }
+  };
+
+  const observer = new MutationObserver((mutations) => {
+    const pending = new Set();
+    for (const m of mutations) {
+      const host = m.target.nodeType === 1 ? m.target : m.target.parentElement;
+      const inside = host && host.closest(TWEET);
+      if (inside) pending.add(inside);
+      for (const node of m.addedNodes) {
+        if (node.nodeType !== 1) continue;
+        if (node.matches(TWEET)) pending.add(node);
+        else node.querySelectorAll(TWEET).forEach(a => pending.add(a));
+      }
+    }
+    pending.forEach(take);
+  });
+
+  document.querySelectorAll(TWEET).forEach(take);
+  observer.observe(document.body, { childList: true, subtree: true, characterData: true });
+
+  window.__xCollector = {
+    // Remove and return up to `max` buffered records (oldest first).
+    drain(max = MAX_BUFFER) {
+      const records = buffer.splice(0, max);
+      return JSON.stringify({ records, ...this.stats() });
+    },
+    stats() {
+      return { seen: seen.size, buffered: buffer.length, dropped };
+    },
+    stop() {
+      observer.disconnect();
+      delete window.__xCollector;
+      return JSON.stringify({ status: 'stopped', seen: seen.size, dropped });
+    }
+  };
+  return JSON.stringify({ status: 'started', ...window.__xCollector.stats() });
+})()
@@ -0,0 +1,236 @@
+"""Scrape many X profiles in parallel over a pool of tabs.
+
+Opens ``--concurrency`` tabs in one CDP session and hands each the next
+handle from the queue, so wall-clock time scales with the pool size rather
+than the number of accounts. A tab that hits X's rate limit backs off on
+its own (exponential, with jitter) while the others keep going. Results
+are merged into one JSONL stream in input order.
+
+    python3 profiles.py karpathy simonw swyx --limit 40 > profiles.jsonl
+    python3 profiles.py --from handles.txt --concurrency 4 --db
+
+Each output line is a collect.py record plus ``profile``. A per-profile
+summary (posts, seconds, retries, error) goes to stderr.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import collect  # noqa: E402
+import store  # noqa: E402
+from cdp import CDPError, Page, connect  # noqa: E402
+from ready import wait_ready  # noqa: E402
+
+ARTICLE = 'article[data-testid="tweet"]'
+
+# Classifies what a profile page settled on. Rate limiting shows as an
+# error panel with a Retry button — instead of the timeline, or below the
+# posts already loaded when it hits mid-scroll.
+PAGE_STATE = """(() => {
+  const text = document.body ? document.body.innerText : '';
+  const retry = Array.from(document.querySelectorAll('button, [role="button"]'))
+    .some(b => /^\\s*retry\\s*$/i.test(b.innerText) && !b.closest('article'));
+  if (retry) return 'rate-limited';
+  if (document.querySelector('article[data-testid="tweet"]')) return 'ok';
+  if (/rate limit|something went wrong|try reloading/i.test(text)) return 'rate-limited';
+  if (/doesn.t exist|account suspended|posts are protected|hasn.t posted/i.test(text)) return 'empty';
+  return 'loading';
+})()"""
+
+
+class RateLimited(Exception):
+    """X kept rate-limiting a tab after every retry; ``records`` holds what was collected."""
+
+    def __init__(self, message: str, records: list[dict]):
+        super().__init__(message)
+        self.records = records
+
+
+class NotRendered(Exception):
+    """The profile showed neither posts nor an error before the render timeout."""
+
+
+@dataclass
+class Result:
+    index: int
+    handle: str
+    records: list[dict] = field(default_factory=list)
+    seconds: float = 0.0
+    retries: int = 0
+    error: Optional[str] = None
+
+
+def normalize(handle: str) -> str:
+    """``@name``, ``name`` or ``https://x.com/name`` -> ``name``."""
+    handle = handle.strip()
+    if "x.com/" in handle or "twitter.com/" in handle:
+        handle = handle.split(".com/", 1)[1].split("/")[0].split("?")[0]
+    return handle.lstrip("@")
+
+
+def scrape_profile(page: Page, handle: str, limit: int, rounds: int, retries: int,
+                   backoff: float, db=None) -> tuple[list[dict], int]:
+    """Collect one profile in ``page``; return its records and how many retries it took.
+
+    A rate-limit panel, whether it replaces the timeline or appears
+    mid-scroll, backs off and retries; posts from a cut-short attempt are
+    kept and merged with the retry's.
+    """
+    records: dict[str, dict] = {}
+    for attempt in range(retries + 1):
+        page.navigate(f"https://x.com/{handle}")
+        wait_ready(page, "fn", "rendered", 8000, expression=f"({PAGE_STATE}) !== 'loading'")
+        state = page.evaluate(PAGE_STATE)
+        if state == "loading":
+            raise NotRendered("profile did not render within 8s")
+        if state == "empty":
+            return list(records.values()), attempt
+        if state == "ok":
+            wait_ready(page, "stable", ARTICLE, 5000, quiet_ms=500)
+            stream = collect.collect(page, limit=limit, rounds=rounds, idle_rounds=2)
+            if db is not None:
+                stream = collect.until_known(stream, db, f"@{handle}")
+            for record in stream:
+                records.setdefault(record["id"], record)
+            # collect() just goes idle when X swaps in its error panel mid-scroll.
+            if page.evaluate(PAGE_STATE) != "rate-limited":
+                return list(records.values())[:limit], attempt
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+    raise RateLimited(f"still rate-limited after {retries} retries", list(records.values())[:limit])
+
+
+def worker(page: Page, jobs: "queue.Queue[tuple[int, str]]", results: "queue.Queue[Result]",
+           args: argparse.Namespace) -> None:
+    # Each worker owns its tab and, with --db, its own SQLite connection.
+    try:
+        db = store.open_store(args.db) if args.db else None
+    except Exception as exc:  # fail the jobs this worker would have taken instead of hanging the merge
+        while True:
+            try:
+                index, handle = jobs.get_nowait()
+            except queue.Empty:
+                return
+            results.put(Result(index, handle, error=f"--db: {exc}"))
+    try:
+        while True:
+            try:
+                index, handle = jobs.get_nowait()
+            except queue.Empty:
+                return
+            result = Result(index, handle)
+            start = time.perf_counter()
+            try:
+                result.records, result.retries = scrape_profile(
+                    page, handle, args.limit, args.rounds, args.retries, args.backoff, db)
+            except RateLimited as exc:
+                result.records, result.retries = exc.records, args.retries
+                result.error = str(exc)
+            except (CDPError, NotRendered) as exc:
+                result.error = str(exc)
+            except Exception as exc:  # never leave the merge loop waiting on a dead worker
+                result.error = f"{type(exc).__name__}: {exc}"
+            result.seconds = round(time.perf_counter() - start, 2)
+            results.put(result)
+    finally:
+        if db is not None:
+            db.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("handles", nargs="*", help="@handles, names or profile URLs")
+    parser.add_argument("--from", dest="from_file", help="file with one handle per line (- for stdin)")
+    parser.add_argument("--concurrency", type=int, default=3, help="tabs in the pool (default 3)")
+    parser.add_argument("--limit", type=int, default=40, help="posts per profile (default 40)")
+    parser.add_argument("--rounds", type=int, default=10, help="max scrolls per profile (default 10)")
+    parser.add_argument("--retries", type=int, default=3, help="rate-limit retries per profile (default 3)")
+    parser.add_argument("--backoff", type=float, default=15.0,
+                        help="base rate-limit backoff in seconds, doubled per retry (default 15)")
+    parser.add_argument("--db", nargs="?", const=store.DEFAULT_DB,
+                        help="store posts under feed @handle and stop at already-stored ones")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default stdout)")
+    parser.add_argument("--cdp", type=int, default=9222)
+    args = parser.parse_args(argv)
+
+    handles = [normalize(h) for h in args.handles]
+    if args.from_file:
+        source = sys.stdin if args.from_file == "-" else open(args.from_file, encoding="utf-8")
+        with source:
+            handles += [normalize(line) for line in source if line.strip() and not line.startswith("#")]
+    handles = list(dict.fromkeys(h for h in handles if h))
+    if not handles:
+        parser.error("no handles given")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    jobs: "queue.Queue[tuple[int, str]]" = queue.Queue()
+    for item in enumerate(handles):
+        jobs.put(item)
+    results: "queue.Queue[Result]" = queue.Queue()
+
+    try:
+        conn = connect(args.cdp)
+        # Separate windows keep every tab foreground, so X keeps rendering
+        # and loading the timeline while we scroll it.
+        pool = [Page.open(conn, new_window=True, background=True)
+                for _ in range(min(args.concurrency, len(handles)))]
+    except CDPError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+    for page in pool:
+        page.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+
+    threads = [threading.Thread(target=worker, args=(page, jobs, results, args), daemon=True)
+               for page in pool]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    ready: dict[int, Result] = {}
+    next_index = failed = total = 0
+    try:
+        # Emit in input order: hold finished profiles until their turn.
+        while next_index < len(handles):
+            result = results.get()
+            ready[result.index] = result
+            while next_index in ready:
+                result = ready.pop(next_index)
+                next_index += 1
+                for record in result.records:
+                    out.write(json.dumps({"profile": result.handle, **record}, ensure_ascii=False) + "\n")
+                out.flush()
+                total += len(result.records)
+                failed += result.error is not None
+                status = f"error: {result.error}" if result.error else f"{len(result.records)} posts"
+                print(f"@{result.handle:<20} {status:<40} {result.seconds:>6.1f}s"
+                      + (f"  {result.retries} retries" if result.retries else ""), file=sys.stderr)
+    finally:
+        if args.output:
+            out.close()
+        for page in pool:
+            try:
+                page.close()
+            except CDPError:
+                pass
+        conn.close()
+    print(f"{total} posts from {len(handles) - failed}/{len(handles)} profiles in "
+          f"{time.perf_counter() - started:.1f}s with {len(pool)} tabs", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
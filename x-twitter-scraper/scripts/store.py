@@ -0,0 +1,244 @@
+"""Local SQLite store for scraped tweets, with full-text search.
+
+Tweets are keyed by status ID, so re-scraping the same posts is a no-op,
+and each feed (``following``, ``foryou``, ``@handle``) remembers which
+posts it has already produced. That lets a scrape stop as soon as it
+reaches posts it has seen, and lets the summarizer answer "last 24h of
+my Following feed" without touching the browser.
+
+    python3 store.py ingest --feed following < feed.jsonl
+    python3 store.py recent --feed following --since 24h
+    python3 store.py search "open source model" --limit 20
+    python3 store.py stats
+
+The database lives at $X_TWEETS_DB, default ~/.local/share/x-skills/tweets.db.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional
+
+DEFAULT_DB = os.environ.get("X_TWEETS_DB", os.path.expanduser("~/.local/share/x-skills/tweets.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id          INTEGER PRIMARY KEY,      -- status ID; snowflakes sort by time
+    handle      TEXT NOT NULL DEFAULT '',
+    user        TEXT NOT NULL DEFAULT '',
+    text        TEXT NOT NULL DEFAULT '',
+    time        TEXT NOT NULL DEFAULT '', -- ISO 8601 UTC, as X renders it
+    link        TEXT NOT NULL DEFAULT '',
+    context     TEXT NOT NULL DEFAULT '',
+    links       TEXT NOT NULL DEFAULT '[]',
+    first_seen  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tweets_handle_time ON tweets (handle, time);
+CREATE INDEX IF NOT EXISTS tweets_time ON tweets (time);
+
+CREATE TABLE IF NOT EXISTS feed_tweets (
+    feed        TEXT NOT NULL,
+    id          INTEGER NOT NULL REFERENCES tweets (id),
+    seen_at     TEXT NOT NULL,
+    PRIMARY KEY (feed, id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5 (
+    text, user, content='tweets', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts (rowid, text, user) VALUES (new.id, new.text, new.user);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text, user) VALUES ('delete', old.id, old.text, old.user);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_au AFTER UPDATE OF text, user ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text, user) VALUES ('delete', old.id, old.text, old.user);
+    INSERT INTO tweets_fts (rowid, text, user) VALUES (new.id, new.text, new.user);
+END;
+"""
+
+COLUMNS = ("id", "handle", "user", "text", "time", "link", "context", "links")
+_STATUS = re.compile(r"/status/(\d+)")
+_SINCE = re.compile(r"^(\d+)\s*([mhdw])$")
+
+
+def open_store(path: str = DEFAULT_DB) -> sqlite3.Connection:
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def status_id(record: dict) -> Optional[int]:
+    """Status ID from a record's ``id`` or, for plain eval output, its ``link``."""
+    if record.get("id"):
+        return int(record["id"])
+    match = _STATUS.search(record.get("link", ""))
+    return int(match.group(1)) if match else None
+
+
+def handle_of(record: dict) -> str:
+    if record.get("handle"):
+        return record["handle"].lstrip("@")
+    match = re.search(r"x\.com/([^/]+)/status/", record.get("link", ""))
+    return match.group(1) if match else ""
+
+
+def is_known(conn: sqlite3.Connection, feed: str, tweet_id: int) -> bool:
+    row = conn.execute("SELECT 1 FROM feed_tweets WHERE feed = ? AND id = ?", (feed, tweet_id)).fetchone()
+    return row is not None
+
+
+def newest_id(conn: sqlite3.Connection, feed: str) -> Optional[int]:
+    row = conn.execute("SELECT MAX(id) FROM feed_tweets WHERE feed = ?", (feed,)).fetchone()
+    return row[0]
+
+
+def upsert(conn: sqlite3.Connection, records: Iterable[dict], feed: Optional[str] = None) -> int:
+    """Store records (refreshing text for ones already stored); return how many were new to ``feed``."""
+    now = _now()
+    new = 0
+    with conn:
+        for record in records:
+            tweet_id = status_id(record)
+            if tweet_id is None:
+                continue
+            conn.execute(
+                """INSERT INTO tweets (id, handle, user, text, time, link, context, links, first_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET
+                       text = excluded.text, user = excluded.user,
+                       links = CASE WHEN excluded.links != '[]' THEN excluded.links ELSE links END""",
+                (tweet_id, handle_of(record), record.get("user", ""), record.get("text", ""),
+                 record.get("time", ""), record.get("link", ""), record.get("context", ""),
+                 json.dumps(record.get("links") or [], ensure_ascii=False), now))
+            if feed:
+                cur = conn.execute("INSERT OR IGNORE INTO feed_tweets (feed, id, seen_at) VALUES (?, ?, ?)",
+                                   (feed, tweet_id, now))
+                new += cur.rowcount
+    return new
+
+
+def parse_since(value: str) -> str:
+    """``24h`` / ``30m`` / ``7d`` / ``2w`` or an ISO timestamp, as an ISO UTC bound."""
+    match = _SINCE.match(value.strip())
+    if match:
+        n, unit = int(match.group(1)), match.group(2)
+        delta = {"m": timedelta(minutes=n), "h": timedelta(hours=n),
+                 "d": timedelta(days=n), "w": timedelta(weeks=n)}[unit]
+        return (datetime.now(timezone.utc) - delta).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc) \
+        .strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _record(row: sqlite3.Row) -> dict:
+    record = {k: row[k] for k in COLUMNS}
+    record["id"] = str(record["id"])
+    record["links"] = json.loads(record["links"])
+    return record
+
+
+def recent(conn: sqlite3.Connection, feed: Optional[str] = None, since: Optional[str] = None,
+           handle: Optional[str] = None, limit: Optional[int] = None) -> list[dict]:
+    """Stored posts, newest first, filtered by feed, author and post time."""
+    sql = "SELECT t.* FROM tweets t"
+    where, params = [], []
+    if feed:
+        sql += " JOIN feed_tweets f ON f.id = t.id AND f.feed = ?"
+        params.append(feed)
+    if since:
+        where.append("t.time >= ?")
+        params.append(parse_since(since))
+    if handle:
+        where.append("t.handle = ?")
+        params.append(handle.lstrip("@"))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY t.time DESC, t.id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [_record(row) for row in conn.execute(sql, params)]
+
+
+def search(conn: sqlite3.Connection, query: str, limit: int = 50) -> list[dict]:
+    """Full-text search over tweet text and author, best match first (FTS5 query syntax)."""
+    rows = conn.execute(
+        """SELECT t.* FROM tweets_fts JOIN tweets t ON t.id = tweets_fts.rowid
+           WHERE tweets_fts MATCH ? ORDER BY rank LIMIT ?""", (query, limit))
+    return [_record(row) for row in rows]
+
+
+def read_records(stream) -> Iterator[dict]:
+    """Records from JSONL (collect.py) or a JSON array (the SKILL.md eval output)."""
+    text = stream.read()
+    if text.lstrip().startswith("["):
+        yield from json.loads(text)
+        return
+    for line in text.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"database path (default {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="store records from stdin (JSONL or JSON array)")
+    p.add_argument("--feed", help="feed name these records came from, e.g. following or @handle")
+
+    p = sub.add_parser("recent", help="stored posts, newest first")
+    p.add_argument("--feed")
+    p.add_argument("--since", help="e.g. 24h, 7d, or an ISO timestamp")
+    p.add_argument("--handle")
+    p.add_argument("--limit", type=int)
+
+    p = sub.add_parser("search", help="full-text search")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=50)
+
+    sub.add_parser("stats", help="per-feed counts and newest post")
+    args = parser.parse_args(argv)
+
+    conn = open_store(args.db)
+    if args.command == "ingest":
+        new = upsert(conn, read_records(sys.stdin), args.feed)
+        print(f"stored {new} new posts" + (f" for {args.feed}" if args.feed else ""), file=sys.stderr)
+    elif args.command in ("recent", "search"):
+        try:
+            records = (recent(conn, args.feed, args.since, args.handle, args.limit)
+                       if args.command == "recent" else search(conn, args.query, args.limit))
+        except (ValueError, sqlite3.OperationalError) as exc:
+            print(f"✗ {exc}", file=sys.stderr)
+            return 2
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+    else:
+        total = conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+        print(f"{total} posts")
+        for row in conn.execute("""SELECT f.feed, COUNT(*) AS n, MAX(t.time) AS newest
+                                   FROM feed_tweets f JOIN tweets t ON t.id = f.id
+                                   GROUP BY f.feed ORDER BY f.feed"""):
+            print(f"  {row['feed']:<20} {row['n']:>7}  newest {row['newest']}")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())